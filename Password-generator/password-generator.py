@@ -1,23 +1,107 @@
+import bisect
+import csv
+import io
+import json
+import math
+import mmap
+import os
 import string
 import secrets
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import NamedTuple
+
+BATCH_SIZE = 10_000
+INDEX_MAGIC = b'PWIDX1\0\0'
+AMBIGUOUS = 'Il1|O0o`\'"'
+OUTPUT_FORMATS = ('pretty', 'plain', 'csv', 'jsonl')
+
+CLASSES = (
+    ('lower', string.ascii_lowercase, b'l'),
+    ('upper', string.ascii_uppercase, b'u'),
+    ('digit', string.digits, b'd'),
+    ('symbol', string.punctuation, b's'),
+)
+CLASS_TABLE = bytes(
+    next((code[0] for _, chars, code in CLASSES if chr(value) in chars), value)
+    for value in range(256)
+)
+SEPARATOR = '\x00'
+
+
+def entropy_table() -> list[float]:
+    # bits per character for every combination of present classes (bit i = CLASSES[i])
+    table = []
+    for mask in range(1 << len(CLASSES)):
+        pool = sum(len(chars) for i, (_, chars, _) in enumerate(CLASSES) if mask >> i & 1)
+        table.append(math.log2(pool) if pool else 0.0)
+    return table
+
+
+ENTROPY_PER_CHAR = entropy_table()
+
+
+class PasswordClasses(NamedTuple):
+    lower: int
+    upper: int
+    digit: int
+    symbol: int
+    length: int
+    entropy: float
+
+
+def count_classes(codes: bytes, original: str) -> PasswordClasses:
+    # codes is the ASCII part of the password run through CLASS_TABLE, so
+    # only non-ASCII characters still need a closer look
+    lower = codes.count(b'l')
+    upper = codes.count(b'u')
+    digit = codes.count(b'd')
+    symbol = codes.count(b's')
+
+    if not original.isascii():
+        for char in original:
+            if char.isascii():
+                continue
+            if char.isupper():
+                upper += 1
+            elif char.islower():
+                lower += 1
+            elif char.isdigit():
+                digit += 1
+
+    mask = bool(lower) | bool(upper) << 1 | bool(digit) << 2 | bool(symbol) << 3
+    length = len(original)
+
+    return PasswordClasses(lower, upper, digit, symbol, length, length * ENTROPY_PER_CHAR[mask])
+
+
+def classify(password: str) -> PasswordClasses:
+    return count_classes(password.encode('ascii', 'ignore').translate(CLASS_TABLE), password)
+
+
+def classify_many(passwords: list[str]) -> list[PasswordClasses]:
+    # translates the whole batch in a single call, then splits it back apart
+    if any(SEPARATOR in password for password in passwords):
+        return [classify(password) for password in passwords]
+
+    joined = SEPARATOR.join(passwords).encode('ascii', 'ignore')
+    codes = joined.translate(CLASS_TABLE).split(SEPARATOR.encode())
+    return [count_classes(code, password) for code, password in zip(codes, passwords)]
+
 
 def contains_upper(password: str) -> bool:
-    for char in password:
-        if char.isupper():
-            return True
-        
-    return False
+    return classify(password).upper > 0
 
 
 def contains_symbols(password: str) -> bool:
-    for char in password:
-        if char in string.punctuation:
-            return True
-        
-    return False
+    return classify(password).symbol > 0
 
 
-def generate_password(length: int, symbols: bool, uppercase: bool) -> str:
+def get_combination(symbols: bool, uppercase: bool) -> str:
     combination = string.ascii_lowercase + string.digits
 
     if symbols:
@@ -26,6 +110,11 @@ def generate_password(length: int, symbols: bool, uppercase: bool) -> str:
     if uppercase:
         combination += string.ascii_uppercase
 
+    return combination
+
+
+def generate_password(length: int, symbols: bool, uppercase: bool) -> str:
+    combination = get_combination(symbols, uppercase)
     combination_length = len(combination)
 
     new_password = ''
@@ -35,8 +124,455 @@ def generate_password(length: int, symbols: bool, uppercase: bool) -> str:
     return new_password
 
 
+def byte_table(combination: str) -> tuple[bytes, bytes]:
+    # maps every random byte to a character; bytes above the largest multiple
+    # of len(combination) are rejected so each character stays equally likely
+    combination_length = len(combination)
+    limit = 256 - 256 % combination_length
+    table = bytes(
+        ord(combination[value % combination_length]) if value < limit else 0
+        for value in range(256)
+    )
+    rejected = bytes(range(limit, 256))
+    return table, rejected
+
+
+def random_characters(amount: int, combination: str) -> str:
+    if not 0 < len(combination) <= 256:
+        raise ValueError("Alphabet must have between 1 and 256 characters")
+
+    # non-ASCII alphabets are drawn as indexes and looked up afterwards
+    ascii_only = combination.isascii()
+    indexes = combination if ascii_only else ''.join(map(chr, range(len(combination))))
+
+    table, rejected = byte_table(indexes)
+    accept_rate = (256 - len(rejected)) / 256
+    pool = b''
+
+    while len(pool) < amount:
+        missing = amount - len(pool)
+        pool += secrets.token_bytes(int(missing / accept_rate) + 64).translate(table, rejected)
+
+    if ascii_only:
+        return pool[:amount].decode('ascii')
+    return ''.join(combination[i] for i in pool[:amount])
+
+
+def generate_passwords(count: int, length: int, symbols: bool, uppercase: bool) -> list[str]:
+    # one big entropy draw for the whole batch instead of one call per character
+    if count <= 0:
+        return []
+    if length <= 0:
+        return [''] * count
+
+    combination = get_combination(symbols, uppercase)
+    characters = random_characters(count * length, combination)
+    return [characters[i:i + length] for i in range(0, count * length, length)]
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    min_lower: int = 0
+    min_upper: int = 0
+    min_digits: int = 0
+    min_symbols: int = 0
+    lower: str = string.ascii_lowercase
+    upper: str = string.ascii_uppercase
+    digits: str = string.digits
+    symbols: str = string.punctuation
+    exclude: str = ''
+
+    @cached_property
+    def classes(self) -> tuple[tuple[str, int], ...]:
+        # (alphabet, minimum) for every usable class, with excluded characters removed
+        classes = []
+        seen = set()
+        for alphabet, minimum in (
+            (self.lower, self.min_lower),
+            (self.upper, self.min_upper),
+            (self.digits, self.min_digits),
+            (self.symbols, self.min_symbols),
+        ):
+            alphabet = ''.join(dict.fromkeys(c for c in alphabet if c not in self.exclude))
+            if not alphabet:
+                if minimum > 0:
+                    raise ValueError("Policy requires a character class with an empty alphabet")
+                continue
+            if seen.intersection(alphabet):
+                raise ValueError("Policy character classes must not overlap")
+            seen.update(alphabet)
+            classes.append((alphabet, minimum))
+
+        if not classes:
+            raise ValueError("Policy has no characters to choose from")
+        return tuple(classes)
+
+    def allows(self, password: str) -> bool:
+        classes = self.classes
+        allowed = ''.join(alphabet for alphabet, _ in classes)
+        if any(char not in allowed for char in password):
+            return False
+        return all(
+            sum(char in alphabet for char in password) >= minimum
+            for alphabet, minimum in classes
+        )
+
+
+@lru_cache(maxsize=64)
+def compliant_counts(classes: tuple[tuple[str, int], ...], length: int) -> list[list[int]]:
+    # counts[i][n]: how many strings of length n, made only of classes i onwards,
+    # meet the minimums of those classes
+    counts = [[0] * (length + 1) for _ in range(len(classes) + 1)]
+    counts[-1][0] = 1
+
+    for i in range(len(classes) - 1, -1, -1):
+        size = len(classes[i][0])
+        minimum = classes[i][1]
+        for n in range(length + 1):
+            counts[i][n] = sum(
+                math.comb(n, c) * size ** c * counts[i + 1][n - c]
+                for c in range(minimum, n + 1)
+            )
+
+    return counts
+
+
+@lru_cache(maxsize=4096)
+def composition_blocks(classes: tuple[tuple[str, int], ...], length: int,
+                       i: int, remaining: int) -> tuple[list[int], list[int]]:
+    # running totals of compliant passwords for every character count class i
+    # can take, plus how many ways the later classes can fill the rest
+    counts = compliant_counts(classes, length)
+    alphabet, minimum = classes[i]
+    totals, rests = [], []
+    total = 0
+    for c in range(minimum, remaining + 1):
+        rest = counts[i + 1][remaining - c]
+        total += math.comb(remaining, c) * len(alphabet) ** c * rest
+        totals.append(total)
+        rests.append(rest)
+    return totals, rests
+
+
+def sample_composition(classes: tuple[tuple[str, int], ...], length: int) -> list[int]:
+    # picks how many characters each class gets, weighted by how many compliant
+    # passwords have that split, so the final password is uniform over all of them
+    counts = compliant_counts(classes, length)
+    if not counts[0][length]:
+        raise ValueError(f"Policy cannot be met with a length of {length}")
+
+    choice = secrets.randbelow(counts[0][length])
+    composition = []
+    remaining = length
+
+    for i, (_, minimum) in enumerate(classes):
+        totals, rests = composition_blocks(classes, length, i, remaining)
+        index = bisect.bisect_right(totals, choice)
+        below = totals[index - 1] if index else 0
+        choice = (choice - below) % rests[index]
+        composition.append(minimum + index)
+        remaining -= minimum + index
+
+    return composition
+
+
+def secure_shuffle(items: list) -> None:
+    # Fisher-Yates driven by a single uniform draw from [0, len(items)!)
+    choice = secrets.randbelow(math.factorial(len(items)))
+    for i in range(len(items) - 1, 0, -1):
+        choice, j = divmod(choice, i + 1)
+        items[i], items[j] = items[j], items[i]
+
+
+def generate_policy_passwords(count: int, length: int, policy: PasswordPolicy) -> list[str]:
+    # required classes are placed by construction, so nothing is ever thrown away
+    if count <= 0:
+        return []
+
+    classes = policy.classes
+    compositions = [sample_composition(classes, length) for _ in range(count)]
+
+    pools = [
+        random_characters(sum(c[i] for c in compositions), alphabet)
+        for i, (alphabet, _) in enumerate(classes)
+    ]
+    offsets = [0] * len(classes)
+
+    passwords = []
+    for composition in compositions:
+        chars = []
+        for i, amount in enumerate(composition):
+            chars.extend(pools[i][offsets[i]:offsets[i] + amount])
+            offsets[i] += amount
+        secure_shuffle(chars)
+        passwords.append(''.join(chars))
+
+    return passwords
+
+
+def generate_policy_password(length: int, policy: PasswordPolicy) -> str:
+    return generate_policy_passwords(1, length, policy)[0]
+
+
+def rejection_policy_password(length: int, policy: PasswordPolicy) -> str:
+    # the regenerate-and-retry approach, kept as a reference for benchmarks
+    combination = ''.join(alphabet for alphabet, _ in policy.classes)
+    while True:
+        password = random_characters(length, combination)
+        if policy.allows(password):
+            return password
+
+
+def index_path(wordlist_path: str) -> str:
+    return f"{wordlist_path}.idx"
+
+
+def wordlist_signature(wordlist_path: str) -> array:
+    stat = os.stat(wordlist_path)
+    return array('Q', [stat.st_size, stat.st_mtime_ns])
+
+
+def build_wordlist_index(wordlist_path: str) -> str:
+    # stores (start, end) byte offsets of every word; EFF-style "11111<TAB>word"
+    # lines keep only the last field
+    offsets = array('Q')
+    position = 0
+
+    with open(wordlist_path, 'rb') as file:
+        for line in file:
+            fields = line.split()
+            if fields:
+                word = fields[-1]
+                start = position + line.rindex(word)
+                offsets.append(start)
+                offsets.append(start + len(word))
+            position += len(line)
+
+    path = index_path(wordlist_path)
+    with open(path, 'wb') as file:
+        file.write(INDEX_MAGIC)
+        wordlist_signature(wordlist_path).tofile(file)
+        offsets.tofile(file)
+
+    return path
+
+
+class WordlistIndex:
+    # words stay in the memory-mapped file until they are picked
+    header_size = len(INDEX_MAGIC) + 2 * 8
+
+    def __init__(self, wordlist_path: str):
+        path = index_path(wordlist_path)
+        if not self.is_fresh(wordlist_path, path):
+            build_wordlist_index(wordlist_path)
+        if os.path.getsize(path) <= self.header_size:
+            raise ValueError(f"Wordlist {wordlist_path} has no words")
+
+        with open(wordlist_path, 'rb') as file:
+            self.words = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(path, 'rb') as file:
+            self.index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.view = memoryview(self.index)
+        self.offsets = self.view[self.header_size:].cast('Q')
+
+    @staticmethod
+    def is_fresh(wordlist_path: str, path: str) -> bool:
+        try:
+            with open(path, 'rb') as file:
+                header = file.read(WordlistIndex.header_size)
+        except FileNotFoundError:
+            return False
+
+        if header[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            return False
+        return header[len(INDEX_MAGIC):] == wordlist_signature(wordlist_path).tobytes()
+
+    def __len__(self) -> int:
+        return len(self.offsets) // 2
+
+    def __getitem__(self, i: int) -> str:
+        return self.words[self.offsets[2 * i]:self.offsets[2 * i + 1]].decode('utf-8')
+
+    def entropy(self, words: int) -> float:
+        return words * math.log2(len(self))
+
+    def close(self):
+        self.offsets.release()
+        self.view.release()
+        self.index.close()
+        self.words.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_passphrases(count: int, words: int, wordlist: WordlistIndex,
+                         separator: str = '-') -> list[str]:
+    size = len(wordlist)
+    return [
+        separator.join(wordlist[secrets.randbelow(size)] for _ in range(words))
+        for _ in range(count)
+    ]
+
+
+def write_passphrases(sink, count: int, words: int, wordlist: WordlistIndex,
+                      separator: str = '-', output_format: str = 'pretty', specs: bool = True):
+    entropy = wordlist.entropy(words)
+
+    if output_format == 'csv':
+        sink.write('index,passphrase,entropy\r\n' if specs else 'index,passphrase\r\n')
+
+    for start, size in iter_batches(count):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        passphrases = generate_passphrases(size, words, wordlist, separator)
+        for i, phrase in enumerate(passphrases, start=start + 1):
+            if output_format == 'plain':
+                buffer.write(f"{phrase}\n")
+            elif output_format == 'pretty':
+                annotation = f" (Entropy: {entropy:.1f} bits)" if specs else ""
+                buffer.write(f"{i} -> \"{phrase}\"{annotation}\n")
+            elif output_format == 'csv':
+                writer.writerow([i, phrase, round(entropy, 2)] if specs else [i, phrase])
+            elif output_format == 'jsonl':
+                record = {'index': i, 'passphrase': phrase}
+                if specs:
+                    record['entropy'] = round(entropy, 2)
+                buffer.write(json.dumps(record) + '\n')
+            else:
+                raise ValueError(f"Unknown output format: {output_format}")
+
+        sink.write(buffer.getvalue())
+
+
+def iter_batches(count: int, batch_size: int = BATCH_SIZE):
+    for start in range(0, count, batch_size):
+        yield start, min(batch_size, count - start)
+
+
+def csv_header(specs: bool) -> str:
+    return 'index,password,uppercase,symbols\r\n' if specs else 'index,password\r\n'
+
+
+def format_passwords(passwords: list[str], start: int, output_format: str, specs: bool) -> str:
+    if output_format == 'plain':
+        return ''.join(f"{pwd}\n" for pwd in passwords)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    classes = classify_many(passwords) if specs else [None] * len(passwords)
+
+    for i, (pwd, pwd_classes) in enumerate(zip(passwords, classes), start=start + 1):
+        if specs:
+            has_upper = pwd_classes.upper > 0
+            has_symbols = pwd_classes.symbol > 0
+
+        if output_format == 'pretty':
+            if specs:
+                annotation = f"Uppercase: {has_upper} , Symbols: {has_symbols}"
+                buffer.write(f"{i} -> \"{pwd}\" ({annotation})\n")
+            else:
+                buffer.write(f"{i} -> \"{pwd}\"\n")
+        elif output_format == 'csv':
+            row = [i, pwd]
+            if specs:
+                row += [has_upper, has_symbols]
+            writer.writerow(row)
+        elif output_format == 'jsonl':
+            record = {'index': i, 'password': pwd}
+            if specs:
+                record['uppercase'] = has_upper
+                record['symbols'] = has_symbols
+            buffer.write(json.dumps(record) + '\n')
+        else:
+            raise ValueError(f"Unknown output format: {output_format}")
+
+    return buffer.getvalue()
+
+
+def generate_chunk(start: int, count: int, length: int, symbols: bool, uppercase: bool,
+                   output_format: str, specs: bool, policy: PasswordPolicy | None = None) -> str:
+    if policy:
+        passwords = generate_policy_passwords(count, length, policy)
+    else:
+        passwords = generate_passwords(count, length, symbols, uppercase)
+    return format_passwords(passwords, start, output_format, specs)
+
+
+def write_passwords(sink, count: int, length: int, symbols: bool, uppercase: bool,
+                    output_format: str = 'pretty', specs: bool = True, workers: int = 1,
+                    policy: PasswordPolicy | None = None):
+    # streams batch by batch so memory stays flat no matter how large count is
+    if output_format == 'csv':
+        sink.write(csv_header(specs))
+
+    tasks = (
+        (start, size, length, symbols, uppercase, output_format, specs, policy)
+        for start, size in iter_batches(count)
+    )
+
+    if workers <= 1:
+        for task in tasks:
+            sink.write(generate_chunk(*task))
+        return
+
+    # every worker draws from os.urandom, so each process has its own
+    # independent CSPRNG stream; only a few batches are in flight at a time
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(generate_chunk, *task))
+            if len(pending) >= workers * 2:
+                sink.write(pending.popleft().result())
+
+        while pending:
+            sink.write(pending.popleft().result())
+
+
+def benchmark_policy(count: int, policy: PasswordPolicy,
+                     lengths: tuple[int, ...] = (8, 16, 32, 64)) -> dict[int, dict[str, float]]:
+    rates = {}
+    for length in lengths:
+        start = time.perf_counter()
+        for _ in range(count):
+            rejection_policy_password(length, policy)
+        rejection_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generate_policy_passwords(count, length, policy)
+        construction_time = time.perf_counter() - start
+
+        rates[length] = {
+            'rejection': count / rejection_time,
+            'construction': count / construction_time,
+        }
+    return rates
+
+
+def benchmark(count: int, length: int, symbols: bool, uppercase: bool) -> dict[str, float]:
+    start = time.perf_counter()
+    for _ in range(count):
+        generate_password(length, symbols, uppercase)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generate_passwords(count, length, symbols, uppercase)
+    bulk_time = time.perf_counter() - start
+
+    return {
+        'loop': count / loop_time,
+        'bulk': count / bulk_time,
+    }
+
+
 if __name__ == "__main__":
     import argparse
+    import sys
 
     parser = argparse.ArgumentParser(
         description="Generate secure passwords with Python's secrets module"
@@ -56,6 +592,82 @@ if __name__ == "__main__":
         help="Number of passwords to generate (default: 1)"
     )
 
+    parser.add_argument(
+        "-o", "--output",
+        help="Write passwords to this file instead of stdout"
+    )
+
+    parser.add_argument(
+        "-f", "--format",
+        choices=OUTPUT_FORMATS,
+        default="pretty",
+        help="Output format (default: pretty)"
+    )
+
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=1,
+        help="Number of processes generating passwords (default: 1)"
+    )
+
+    parser.add_argument(
+        "--no-specs",
+        action="store_true",
+        help="Leave out the uppercase/symbols annotation"
+    )
+
+    for name in ("lower", "upper", "digits", "symbols"):
+        parser.add_argument(
+            f"--min-{name}",
+            type=int,
+            default=0,
+            help=f"Guarantee at least this many {name} characters (default: 0)"
+        )
+
+    parser.add_argument(
+        "--exclude",
+        default="",
+        help="Characters that must never appear in the password"
+    )
+
+    parser.add_argument(
+        "--exclude-ambiguous",
+        action="store_true",
+        help=f"Leave out look-alike characters ({AMBIGUOUS})"
+    )
+
+    parser.add_argument(
+        "--policy-benchmark",
+        action="store_true",
+        help="Compare policy generation by construction with regenerate-and-retry at lengths 8-64"
+    )
+
+    parser.add_argument(
+        "-p", "--passphrase",
+        type=int,
+        metavar="WORDS",
+        help="Generate passphrases of this many words instead of passwords"
+    )
+
+    parser.add_argument(
+        "--wordlist",
+        default="eff_large_wordlist.txt",
+        help="Wordlist for passphrases, one word per line (default: eff_large_wordlist.txt)"
+    )
+
+    parser.add_argument(
+        "--separator",
+        default="-",
+        help="Separator between passphrase words (default: -)"
+    )
+
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Compare passwords/sec of the per-character loop and the bulk generator"
+    )
+
     
     symbols_group = parser.add_mutually_exclusive_group()
     symbols_group.add_argument(
@@ -82,17 +694,88 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
+    if args.passphrase is not None and args.passphrase < 1:
+        parser.error("--passphrase needs at least 1 word")
 
     
-    use_symbols = args.symbols and not args.no_symbols
-    use_uppercase = args.uppercase and not args.no_uppercase
-
-    for i in range(args.count):
-        new_pass = generate_password(
-            length=args.length,
-            symbols=use_symbols,
-            uppercase=use_uppercase
+    use_symbols = (args.symbols or args.min_symbols > 0) and not args.no_symbols
+    use_uppercase = (args.uppercase or args.min_upper > 0) and not args.no_uppercase
+
+    policy = None
+    exclude = args.exclude + (AMBIGUOUS if args.exclude_ambiguous else "")
+    if args.policy_benchmark or exclude or any(
+        (args.min_lower, args.min_upper, args.min_digits, args.min_symbols)
+    ):
+        policy = PasswordPolicy(
+            min_lower=args.min_lower,
+            min_upper=args.min_upper,
+            min_digits=args.min_digits,
+            min_symbols=args.min_symbols,
+            upper=string.ascii_uppercase if use_uppercase else "",
+            symbols=string.punctuation if use_symbols else "",
+            exclude=exclude
         )
-        specs = f"Uppercase: {contains_upper(new_pass)} , Symbols: {contains_symbols(new_pass)}"
-        print(f"{i+1} -> \"{new_pass}\" ({specs})")
+        # impossible combinations, e.g. --min-symbols 1 --no-symbols, are usage errors
+        try:
+            classes = policy.classes
+            if not args.policy_benchmark and args.passphrase is None:
+                sample_composition(classes, args.length)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.policy_benchmark:
+        for length, rates in benchmark_policy(args.count, policy).items():
+            print(
+                f"Length {length}: retry {rates['rejection']:,.0f} passwords/sec, "
+                f"construction {rates['construction']:,.0f} passwords/sec"
+            )
+        raise SystemExit
+
+    if args.benchmark:
+        rates = benchmark(args.count, args.length, use_symbols, use_uppercase)
+        print(f"Loop: {rates['loop']:,.0f} passwords/sec")
+        print(f"Bulk: {rates['bulk']:,.0f} passwords/sec ({rates['bulk'] / rates['loop']:.1f}x)")
+        raise SystemExit
+
+    wordlist = None
+    if args.passphrase is not None:
+        try:
+            wordlist = WordlistIndex(args.wordlist)
+        except FileNotFoundError:
+            parser.error(f"wordlist {args.wordlist} not found; download the EFF long list or pass --wordlist")
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.output:
+        sink = open(args.output, 'w', newline='', encoding='utf-8', buffering=1 << 20)
+    else:
+        sink = sys.stdout
+
+    try:
+        if wordlist is not None:
+            with wordlist:
+                write_passphrases(
+                    sink,
+                    count=args.count,
+                    words=args.passphrase,
+                    wordlist=wordlist,
+                    separator=args.separator,
+                    output_format=args.format,
+                    specs=not args.no_specs
+                )
+        else:
+            write_passwords(
+                sink,
+                count=args.count,
+                length=args.length,
+                symbols=use_symbols,
+                uppercase=use_uppercase,
+                output_format=args.format,
+                specs=not args.no_specs,
+                workers=args.workers,
+                policy=policy
+            )
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
 
@@ -1,5 +1,15 @@
+import io
+import json
+import math
 import string
-from password_generator import generate_password, contains_upper, contains_symbols
+import pytest
+from collections import Counter
+from password_generator import (
+    generate_password, generate_passwords, byte_table, contains_upper, contains_symbols,
+    format_passwords, write_passwords, classify, classify_many,
+    PasswordPolicy, AMBIGUOUS, generate_policy_passwords,
+    WordlistIndex, index_path, generate_passphrases
+)
 
 def test_contains_upper_true():
     assert contains_upper("Abc") is True
@@ -13,6 +23,25 @@ def test_contains_symbols_true():
 def test_contains_symbols_false():
     assert contains_symbols("abc") is False
 
+def test_contains_upper_unicode():
+    assert contains_upper("Ärger") is True
+    assert contains_upper("ärger") is False
+
+def test_classify_counts():
+    classes = classify("aB3$cd")
+    assert (classes.lower, classes.upper, classes.digit, classes.symbol) == (3, 1, 1, 1)
+    assert classes.length == 6
+    assert classes.entropy == pytest.approx(6 * math.log2(26 + 26 + 10 + 32))
+
+def test_classify_empty():
+    classes = classify("")
+    assert classes.length == 0
+    assert classes.entropy == 0.0
+
+def test_classify_many_matches_classify():
+    pwds = ["abc", "ABC123", "", "p@ss\x00word", "Ünïcode!"]
+    assert classify_many(pwds) == [classify(pwd) for pwd in pwds]
+
 def test_generate_password_length():
     pwd = generate_password(length=12, symbols=True, uppercase=True)
     assert len(pwd) == 12
@@ -38,3 +67,110 @@ def test_generate_password_without_symbols_uppercase():
     # Should have no symbols
     has_symbol = any(c in string.punctuation for c in pwd)
     assert has_symbol is False
+
+def test_generate_passwords_count_and_length():
+    pwds = generate_passwords(count=50, length=12, symbols=True, uppercase=True)
+    assert len(pwds) == 50
+    assert all(len(pwd) == 12 for pwd in pwds)
+
+def test_generate_passwords_alphabet():
+    pwds = generate_passwords(count=100, length=20, symbols=False, uppercase=False)
+    allowed = set(string.ascii_lowercase + string.digits)
+    assert all(set(pwd) <= allowed for pwd in pwds)
+
+def test_generate_passwords_empty():
+    assert generate_passwords(count=0, length=10, symbols=True, uppercase=True) == []
+    assert generate_passwords(count=2, length=0, symbols=True, uppercase=True) == ['', '']
+
+def test_byte_table_is_unbiased():
+    combination = string.ascii_lowercase + string.digits
+    table, rejected = byte_table(combination)
+    accepted = [table[value] for value in range(256) if value not in rejected]
+
+    # every character is reachable from exactly the same number of byte values
+    counts = Counter(accepted)
+    assert set(counts) == {ord(char) for char in combination}
+    assert len(set(counts.values())) == 1
+
+def test_format_passwords_pretty():
+    out = format_passwords(["Ab!"], start=0, output_format="pretty", specs=True)
+    assert out == '1 -> "Ab!" (Uppercase: True , Symbols: True)\n'
+
+def test_format_passwords_jsonl_without_specs():
+    out = format_passwords(["abc", "def"], start=5, output_format="jsonl", specs=False)
+    records = [json.loads(line) for line in out.splitlines()]
+    assert records == [{"index": 6, "password": "abc"}, {"index": 7, "password": "def"}]
+
+def test_write_passwords_csv_stream():
+    sink = io.StringIO()
+    write_passwords(sink, count=25_000, length=8, symbols=False, uppercase=True,
+                    output_format="csv", specs=False)
+    lines = sink.getvalue().splitlines()
+    assert lines[0] == "index,password"
+    assert len(lines) == 25_001
+    assert lines[-1].startswith("25000,")
+
+def test_write_passwords_workers():
+    sink = io.StringIO()
+    write_passwords(sink, count=30_000, length=8, symbols=True, uppercase=True,
+                    output_format="plain", workers=2)
+    pwds = sink.getvalue().splitlines()
+    assert len(pwds) == 30_000
+    assert all(len(pwd) == 8 for pwd in pwds)
+
+def test_policy_passwords_meet_minimums():
+    policy = PasswordPolicy(min_upper=1, min_digits=2, min_symbols=1, exclude=AMBIGUOUS)
+    pwds = generate_policy_passwords(count=500, length=6, policy=policy)
+    assert all(len(pwd) == 6 and policy.allows(pwd) for pwd in pwds)
+    assert not any(set(AMBIGUOUS) & set(pwd) for pwd in pwds)
+
+def test_policy_passwords_are_uniform():
+    # 27 strings of length 3 over "ab1", 8 of which have no digit
+    policy = PasswordPolicy(lower="ab", upper="", digits="1", symbols="", min_digits=1)
+    counts = Counter(generate_policy_passwords(count=19_000, length=3, policy=policy))
+    assert len(counts) == 19
+    assert all(700 < amount < 1300 for amount in counts.values())
+
+def test_policy_custom_alphabet():
+    policy = PasswordPolicy(lower="äöü", upper="", digits="", symbols="", min_lower=4)
+    pwd = generate_policy_passwords(count=1, length=4, policy=policy)[0]
+    assert set(pwd) <= set("äöü")
+
+def test_policy_impossible():
+    with pytest.raises(ValueError):
+        generate_policy_passwords(count=1, length=3, policy=PasswordPolicy(min_upper=2, min_digits=2))
+    with pytest.raises(ValueError):
+        PasswordPolicy(upper="abc").classes
+
+def test_wordlist_index_reads_eff_format(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("11111\tabacus\n11112\tabdomen\n\n11113\tabide\n")
+
+    with WordlistIndex(str(wordlist)) as words:
+        assert len(words) == 3
+        assert [words[i] for i in range(3)] == ["abacus", "abdomen", "abide"]
+        assert words.entropy(2) == pytest.approx(2 * math.log2(3))
+
+    assert index_path(str(wordlist)) == str(tmp_path / "words.txt.idx")
+    assert (tmp_path / "words.txt.idx").exists()
+
+def test_wordlist_index_rebuilds_when_wordlist_changes(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("alpha\nbravo\n")
+    WordlistIndex(str(wordlist)).close()
+
+    wordlist.write_text("charlie\ndelta\necho\n")
+    with WordlistIndex(str(wordlist)) as words:
+        assert len(words) == 3
+        assert words[2] == "echo"
+
+def test_generate_passphrases(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("alpha\nbravo\ncharlie\n")
+
+    with WordlistIndex(str(wordlist)) as words:
+        phrases = generate_passphrases(count=10, words=4, wordlist=words, separator=" ")
+
+    assert len(phrases) == 10
+    assert all(len(phrase.split(" ")) == 4 for phrase in phrases)
+    assert all(set(phrase.split(" ")) <= {"alpha", "bravo", "charlie"} for phrase in phrases)
@@ -1,26 +1,290 @@
+import argparse
 import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import threading
+import time
 import requests
-from fake_useragent import UserAgent
+import sqlite3
+from collections import deque
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, astuple, dataclass, field, fields
+from functools import cached_property
 from http import HTTPStatus
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit, urlunsplit
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import create_connection
 
 csv_path = "websites.csv"
+output_path = "website_status.csv"
+CONCURRENCY = 20
+# one kept-alive connection per host; raise it to check a host's URLs in parallel
+PER_HOST_LIMIT = 1
+TIMEOUT = 5
+CHUNK_SIZE = 64 * 1024
+PERCENTILES = (50, 95, 99)
+LATENCY_FIELDS = ('dns', 'connect', 'tls', 'ttfb', 'total')
+REPORT_HEADER = ['Website', 'Status', 'Status code', 'DNS ms', 'Connect ms', 'TLS ms',
+                 'TTFB ms', 'Total ms', 'Bytes', 'Redirects', 'Method', 'Transferred']
+MONITOR_INTERVAL = 60
+MIN_INTERVAL = 10
+MAX_BACKOFF = 3600
+FLAP_WINDOW = 10
+FLAP_CHANGES = 3
+RELOAD_CHECK = 5
+LOG_MAX_BYTES = 10 * 1024 * 1024
+PROBE_BYTES = 16 * 1024
+# answers that mean the server does not support HEAD for this resource
+HEAD_REJECTED = {405, 501}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# checks queued ahead of the workers while the CSV is still being read
+QUEUE_FACTOR = 4
+# read further while fewer hosts than workers have work, but never hold more URLs
+READ_AHEAD_LIMIT = 100_000
+# getaddrinfo does not expose record TTLs, so answers are kept this long
+DNS_TTL = 300
+DNS_FAILURE_TTL = 30
+UA_STRATEGIES = ('fixed', 'round-robin', 'random')
+USER_AGENT_CACHE = "user_agents.txt"
+UA_LIST_SIZE = 50
+# used when no user agent file is given, so the checker needs no network to start
+BUNDLED_USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:133.0) Gecko/20100101 Firefox/133.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.1 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",
+)
 
-def get_websites(csv_path: str) -> list[str]:
-    websites = []
-    with open(csv_path, 'r', newline='', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            if not row:
-                continue
-            url = row[1].strip() if len(row) > 1 else row[0].strip()
-            if not url.startswith(('http://', 'https://')):
-                url = f"https://{url}"
-            websites.append(url)
-    return websites
-
-def get_user_agent() -> str:
-    ua = UserAgent()
-    return ua.chrome
+# connection timings of the request currently running on this thread
+timings = threading.local()
+
+class DnsCache:
+    # host -> (expiry, getaddrinfo answer or the error it raised); the time each
+    # lookup took is kept until the first check of that host reports it
+    def __init__(self, ttl: float = DNS_TTL, failure_ttl: float = DNS_FAILURE_TTL):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.entries = {}
+        self.lookup_times = {}
+
+    def resolve(self, host: str) -> list[tuple]:
+        now = time.monotonic()
+        entry = self.entries.get(host)
+        if entry is None or entry[0] <= now:
+            start = time.perf_counter()
+            try:
+                answer = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+                entry = (now + self.ttl, answer)
+            except socket.gaierror as e:
+                entry = (now + self.failure_ttl, e)
+            self.lookup_times[host] = time.perf_counter() - start
+            self.entries[host] = entry
+        if isinstance(entry[1], Exception):
+            raise entry[1]
+        return entry[1]
+
+    def lookup_time(self, host: str) -> float:
+        # reported once per lookup; later checks of the host hit the cache
+        return self.lookup_times.pop(host, 0.0)
+
+dns_cache = DnsCache()
+
+def open_socket(connection: HTTPConnection) -> socket.socket:
+    # like HTTPConnection._new_conn, but connects to the addresses in dns_cache
+    try:
+        answer = dns_cache.resolve(connection._dns_host)
+    except socket.gaierror as e:
+        raise NameResolutionError(connection.host, connection, e) from e
+
+    error = None
+    for *_, address in answer:
+        try:
+            return create_connection((address[0], connection.port), connection.timeout,
+                                     source_address=connection.source_address,
+                                     socket_options=connection.socket_options)
+        except socket.timeout as e:
+            error = ConnectTimeoutError(
+                connection, f"Connection to {connection.host} timed out. (connect timeout={connection.timeout})")
+        except OSError as e:
+            error = NewConnectionError(connection, f"Failed to establish a new connection: {e}")
+    raise error
+
+@dataclass
+class CheckResult:
+    website: str
+    status_code: int | None = None
+    status: str = ''
+    error: str = ''
+    # dns, connect and tls are the duration of each phase (0 when a kept-alive
+    # connection was reused); ttfb and total are measured from the start
+    dns: float | None = None
+    connect: float | None = None
+    tls: float | None = None
+    ttfb: float | None = None
+    total: float | None = None
+    size: int = 0
+    redirects: int = 0
+    method: str = 'GET'
+    # bytes received over the wire, headers and redirects included
+    transferred: int = 0
+
+    def describe(self) -> str:
+        if self.error:
+            return f"Could not reach this site: {self.website} ({self.error})"
+        return f"{self.website} -> {self.status} ({self.total * 1000:.0f} ms)"
+
+class TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = open_socket(self)
+        timings.connect += time.perf_counter() - start
+        return sock
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = open_socket(self)
+        self.tcp_time = time.perf_counter() - start
+        timings.connect += self.tcp_time
+        return sock
+
+    def connect(self):
+        # HTTPSConnection.connect opens the socket and then does the handshake
+        start = time.perf_counter()
+        super().connect()
+        timings.tls += time.perf_counter() - start - self.tcp_time
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+def normalize_url(url: str) -> str | None:
+    url = url.strip()
+    if not url:
+        return None
+    scheme, separator, _ = url.partition('://')
+    if not separator or not scheme.isalpha():
+        url = f"https://{url}"
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = parts.hostname
+        port = parts.port
+    except ValueError:
+        return None
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            return None
+    if ':' in host:
+        host = f"[{host}]"
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    if parts.username:
+        netloc = f"{parts.netloc.rpartition('@')[0]}@{netloc}"
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
+
+class SeenFilter:
+    # the 64-bit hash of every URL seen so far, a fraction of the memory of the
+    # URLs themselves; two of a million URLs share a hash about once in 37 million runs
+    def __init__(self):
+        self.hashes = set()
+
+    def add(self, item: str) -> bool:
+        # returns False when the item was added before
+        key = hash(item)
+        if key in self.hashes:
+            return False
+        self.hashes.add(key)
+        return True
+
+class WebsiteReader:
+    # yields normalised, de-duplicated URLs while the CSV is read
+    def __init__(self, csv_path: str):
+        self.csv_path = csv_path
+        self.rows = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def __iter__(self):
+        seen = SeenFilter()
+        with open(self.csv_path, 'r', newline='', encoding='utf-8') as file:
+            for row in csv.reader(file):
+                if not row:
+                    continue
+                self.rows += 1
+                url = normalize_url(row[1] if len(row) > 1 else row[0])
+                if url is None:
+                    self.invalid += 1
+                elif seen.add(url):
+                    yield url
+                else:
+                    self.duplicates += 1
+
+def fake_user_agents(limit: int = UA_LIST_SIZE) -> list[str]:
+    # only imported on request: loading its dataset is slow and may need the network
+    from fake_useragent import UserAgent
+
+    browsers = [entry for entry in UserAgent().data_browsers if entry['type'] == 'desktop']
+    browsers.sort(key=lambda entry: entry['percent'], reverse=True)
+    return [entry['useragent'] for entry in browsers[:limit]]
+
+class UserAgentProvider:
+    def __init__(self, strategy: str = 'fixed', path: str | None = None, refresh: bool = False):
+        self.strategy = strategy
+        self.path = path
+        self.refresh = refresh
+        self.counter = itertools.count()
+
+    @cached_property
+    def agents(self) -> tuple[str, ...]:
+        # loaded on first use and kept for the rest of the run; without a path,
+        # the list an earlier --fake-useragent run saved is used when there is one
+        path = self.path or USER_AGENT_CACHE
+        if self.refresh:
+            agents = fake_user_agents()
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(agents) + '\n')
+            return tuple(agents)
+        if self.path or os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                agents = tuple(line.strip() for line in file if line.strip())
+            if agents:
+                return agents
+        return BUNDLED_USER_AGENTS
+
+    def __call__(self) -> str:
+        if self.strategy == 'round-robin':
+            return self.agents[next(self.counter) % len(self.agents)]
+        if self.strategy == 'random':
+            return random.choice(self.agents)
+        return self.agents[0]
 
 def get_status_description(status_code: int) -> str:
     try:
@@ -29,29 +293,513 @@ def get_status_description(status_code: int) -> str:
     except ValueError:
         return "Unknown status code!"
 
-def check_website(website: str, user_agent: str) -> str:
+def make_session(concurrency: int = CONCURRENCY, per_host: int = PER_HOST_LIMIT) -> requests.Session:
+    # one keep-alive pool per host, shared by every worker thread
+    session = requests.Session()
+    adapter = TimedAdapter(pool_connections=concurrency, pool_maxsize=per_host)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def resolve_time(website: str) -> float:
+    # the first check of a host reports the lookup, even one check_websites ran
+    # ahead of it; close to zero after that
+    host = urlsplit(website).hostname
+    start = time.perf_counter()
+    dns_cache.resolve(host)
+    return max(time.perf_counter() - start, dns_cache.lookup_time(host))
+
+def load_validators(path: str) -> dict[str, dict[str, str]]:
     try:
-        response = requests.get(website, headers={'User-Agent': user_agent}, timeout=5)
-        return f"{website} -> {get_status_description(response.status_code)}"
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_validators(path: str, validators: dict[str, dict[str, str]]):
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as file:
+        json.dump(validators, file)
+    os.replace(f"{path}.tmp", path)
+
+def conditional_headers(website: str, validators: dict | None) -> dict[str, str]:
+    cached = validators.get(website) if validators is not None else None
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+def remember_validators(website: str, response: requests.Response, validators: dict | None):
+    # a 304 means the cached validators are still current
+    if validators is None or not response.ok or response.status_code == 304:
+        return
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        validators[website] = {'etag': etag, 'last_modified': last_modified}
+
+def wire_bytes(response: requests.Response) -> int:
+    # status line and headers are rebuilt, the body is what urllib3 read off the socket
+    head = len(f"HTTP/1.1 {response.status_code} {response.reason}\r\n\r\n")
+    head += sum(len(name) + len(value) + 4 for name, value in response.headers.items())
+    return head + response.raw.tell()
+
+def check_website(website: str, user_agent: str, session: requests.Session | None = None,
+                  timeout: float = TIMEOUT, probe: int | None = None,
+                  validators: dict | None = None) -> CheckResult:
+    # probe is the most body bytes to read; None downloads the whole page
+    client = session or make_session(1, 1)
+    result = CheckResult(website)
+    headers = {'User-Agent': user_agent, **conditional_headers(website, validators)}
+    timings.connect = timings.tls = 0.0
+    start = time.perf_counter()
+
+    try:
+        result.dns = resolve_time(website)
+        response = None
+        if probe is not None:
+            response = client.head(website, headers=headers, timeout=timeout, allow_redirects=True)
+            result.method = 'HEAD'
+            if response.status_code in HEAD_REJECTED:
+                result.transferred += sum(wire_bytes(r) for r in (*response.history, response))
+                response = None
+
+        if response is None:
+            if probe is not None:
+                headers['Range'] = f"bytes=0-{probe - 1}"
+            response = client.get(website, headers=headers, timeout=timeout, stream=True)
+            result.method = 'GET' if probe is None else 'GET range'
+            with response:
+                result.ttfb = time.perf_counter() - start
+                # the probe split into equal chunks of at most CHUNK_SIZE, so a server
+                # that ignores Range is cut off at the probe, not a chunk past it
+                chunk_size = CHUNK_SIZE if probe is None else math.ceil(probe / math.ceil(probe / CHUNK_SIZE))
+                for chunk in response.iter_content(chunk_size):
+                    result.size += len(chunk)
+                    if probe is not None and result.size >= probe:
+                        result.size = probe
+                        break
+        else:
+            result.ttfb = time.perf_counter() - start
+
+        result.status_code = response.status_code
+        result.status = get_status_description(response.status_code)
+        result.redirects = len(response.history)
+        result.transferred += sum(wire_bytes(r) for r in (*response.history, response))
+        remember_validators(website, response, validators)
     except Exception as e:
-        return f"Could not reach this site: {website} ({e.__class__.__name__})"
+        result.error = e.__class__.__name__
+    finally:
+        if session is None:
+            client.close()
+
+    result.total = time.perf_counter() - start
+    result.connect = timings.connect
+    result.tls = timings.tls
+    return result
+
+def check_websites(sites: Iterable[str], user_agents: UserAgentProvider, concurrency: int = CONCURRENCY,
+                   per_host: int = PER_HOST_LIMIT, timeout: float = TIMEOUT, probe: int | None = None,
+                   validators: dict | None = None):
+    # yields results as they complete, so one slow host never holds up the rest.
+    # URLs are grouped by host: each new host is resolved in the background, its
+    # URLs then take turns on at most per_host kept-alive connections, and every
+    # URL of a host that does not resolve fails at once
+    session = make_session(concurrency, per_host)
+    sites = iter(sites)
+    resolved = {}
+    queued = {}
+    ready = set()
+    active = {}
+    resolving = {}
+    running = {}
+    waiting = 0
+
+    def check(site: str) -> CheckResult:
+        return check_website(site, user_agents(), session, timeout, probe, validators)
+
+    def starved() -> bool:
+        # per_host caps each host, so a run of one host's rows fills the queue
+        # without giving the other workers anything to do
+        slots = sum(active.values()) + sum(
+            min(per_host - active.get(host, 0), len(pending)) for host, pending in queued.items())
+        return slots < concurrency
+
+    def unresolved(site: str, error: Exception) -> CheckResult:
+        dns = dns_cache.lookup_time(urlsplit(site).hostname)
+        return CheckResult(site, error=error.__class__.__name__, dns=dns, total=dns)
+
+    with session, ThreadPoolExecutor(max_workers=concurrency) as executor, \
+            ThreadPoolExecutor(max_workers=concurrency) as resolver:
+        while True:
+            while waiting < READ_AHEAD_LIMIT and (
+                    waiting + len(running) < concurrency * QUEUE_FACTOR or starved()):
+                site = next(sites, None)
+                if site is None:
+                    break
+                host = urlsplit(site).hostname
+                if host not in resolved:
+                    resolved[host] = None
+                    resolving[resolver.submit(dns_cache.resolve, host)] = host
+                elif isinstance(resolved[host], Exception):
+                    yield unresolved(site, resolved[host])
+                    continue
+                elif resolved[host]:
+                    ready.add(host)
+                queued.setdefault(host, deque()).append(site)
+                waiting += 1
+
+            for host in list(ready):
+                pending = queued[host]
+                while pending and active.get(host, 0) < per_host:
+                    running[executor.submit(check, pending.popleft())] = host
+                    active[host] = active.get(host, 0) + 1
+                    waiting -= 1
+                if not pending:
+                    del queued[host]
+                ready.discard(host)
+
+            if not running and not resolving:
+                break
+            done, _ = wait([*running, *resolving], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in resolving:
+                    host = resolving.pop(future)
+                    resolved[host] = future.exception() or True
+                    if resolved[host] is True:
+                        ready.add(host)
+                        continue
+                    pending = queued.pop(host)
+                    waiting -= len(pending)
+                    for site in pending:
+                        yield unresolved(site, resolved[host])
+                else:
+                    host = running.pop(future)
+                    active[host] -= 1
+                    if not active[host]:
+                        del active[host]
+                    if host in queued:
+                        ready.add(host)
+                    yield future.result()
+
+def percentile(values: list[float], p: float) -> float | None:
+    # linear interpolation between the closest ranks
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+def summarize(results: list[CheckResult]) -> dict[str, dict[str, float | None]]:
+    reached = [result for result in results if not result.error]
+    summary = {}
+    for field in LATENCY_FIELDS:
+        values = [getattr(result, field) for result in reached]
+        summary[field] = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    return summary
+
+def csv_row(result: CheckResult) -> list:
+    def ms(value):
+        return '' if value is None else round(value * 1000, 1)
+
+    status = result.status or f"Could not reach this site ({result.error})"
+    return [result.website, status, result.status_code or '',
+            *(ms(getattr(result, field)) for field in LATENCY_FIELDS),
+            result.size, result.redirects, result.method, result.transferred]
+
+def write_json(path: str, results: list[CheckResult], summary: dict):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'results': [asdict(result) for result in results], 'summary': summary}, file, indent=2)
+
+def write_prometheus(path: str, results: list[CheckResult], summary: dict):
+    # node_exporter textfile format; written to a temp file and renamed so the
+    # collector never reads half a file
+    def label(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"')
+
+    lines = [
+        '# HELP website_up Whether the website answered the check.',
+        '# TYPE website_up gauge',
+        *(f'website_up{{url="{label(r.website)}"}} {0 if r.error else 1}' for r in results),
+        '# HELP website_status_code HTTP status code of the final response.',
+        '# TYPE website_status_code gauge',
+        *(f'website_status_code{{url="{label(r.website)}"}} {r.status_code}' for r in results if not r.error),
+        '# HELP website_latency_seconds Duration of each phase of the check.',
+        '# TYPE website_latency_seconds gauge',
+        *(f'website_latency_seconds{{url="{label(r.website)}",phase="{field}"}} {getattr(r, field):.6f}'
+          for r in results if not r.error for field in LATENCY_FIELDS),
+        '# HELP website_response_bytes Size of the response body.',
+        '# TYPE website_response_bytes gauge',
+        *(f'website_response_bytes{{url="{label(r.website)}"}} {r.size}' for r in results if not r.error),
+        '# HELP website_redirects Number of redirects followed.',
+        '# TYPE website_redirects gauge',
+        *(f'website_redirects{{url="{label(r.website)}"}} {r.redirects}' for r in results if not r.error),
+        '# HELP website_transferred_bytes Bytes received for the check, headers and redirects included.',
+        '# TYPE website_transferred_bytes gauge',
+        *(f'website_transferred_bytes{{url="{label(r.website)}"}} {r.transferred}' for r in results if not r.error),
+        '# HELP website_latency_quantile_seconds Latency percentiles across all websites of the run.',
+        '# TYPE website_latency_quantile_seconds gauge',
+        *(f'website_latency_quantile_seconds{{phase="{field}",quantile="{int(name[1:]) / 100}"}} {value:.6f}'
+          for field, values in summary.items() for name, value in values.items() if value is not None),
+    ]
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    os.replace(f"{path}.tmp", path)
+
+def print_summary(results: list[CheckResult], summary: dict):
+    down = sum(1 for result in results if result.error)
+    print(f"\nChecked {len(results)} websites, {down} unreachable")
+    for field, values in summary.items():
+        cells = ', '.join(
+            f"{name} {value * 1000:.0f} ms" if value is not None else f"{name} -"
+            for name, value in values.items()
+        )
+        print(f"{field:>8}: {cells}")
+    print(f"Transferred {sum(result.transferred for result in results):,} bytes")
+
+@dataclass
+class SiteState:
+    interval: float
+    due: float = 0.0
+    failures: int = 0
+    history: deque = field(default_factory=lambda: deque(maxlen=FLAP_WINDOW))
+
+    def record(self, up: bool):
+        self.failures = 0 if up else self.failures + 1
+        self.history.append(up)
+
+    def flapping(self) -> bool:
+        changes = sum(1 for a, b in zip(self.history, list(self.history)[1:]) if a != b)
+        return changes >= FLAP_CHANGES
+
+    def next_delay(self) -> float:
+        if self.flapping():
+            # a site going up and down gets watched closely until it settles
+            return max(MIN_INTERVAL, self.interval / 4)
+        if self.failures > 1:
+            # a site that stays down is retried less and less often
+            return min(MAX_BACKOFF, self.interval * 2 ** (self.failures - 1))
+        return self.interval
+
+class SqliteStore:
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        columns = ', '.join(f.name for f in fields(CheckResult))
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS checks (checked_at REAL, {columns})")
+        self.insert = f"INSERT INTO checks VALUES ({', '.join('?' * (len(fields(CheckResult)) + 1))})"
+
+    def write(self, checked_at: float, result: CheckResult):
+        self.connection.execute(self.insert, (checked_at, *astuple(result)))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+class RollingLog:
+    # CSV log that moves to <path>.1 once it grows past max_bytes
+    def __init__(self, path: str, max_bytes: int = LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.open()
+
+    def open(self):
+        self.file = open(self.path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0:
+            self.writer.writerow(['Checked at', *REPORT_HEADER])
+
+    def write(self, checked_at: float, result: CheckResult):
+        self.writer.writerow([time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(checked_at)), *csv_row(result)])
+        self.file.flush()
+        if self.file.tell() >= self.max_bytes:
+            self.file.close()
+            os.replace(self.path, f"{self.path}.1")
+            self.open()
+
+    def close(self):
+        self.file.close()
+
+def open_store(path: str):
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SqliteStore(path)
+    return RollingLog(path)
+
+def monitor(path: str, store_path: str, user_agents: UserAgentProvider, interval: float = MONITOR_INTERVAL, concurrency: int = CONCURRENCY,
+            per_host: int = PER_HOST_LIMIT, timeout: float = TIMEOUT, probe: int | None = None,
+            validators: dict | None = None):
+    # the session, its connections and the user agents live as long as the monitor
+    session = make_session(concurrency, per_host)
+    store = open_store(store_path)
+    states = {}
+    schedule = []
+    running = {}
+    active = {}
+    held = {}
+    modified = None
+    next_reload = 0.0
+
+    def check(site: str) -> CheckResult:
+        return check_website(site, user_agents(), session, timeout, probe, validators)
+
+    def release(host: str):
+        # a check of host finished: its next held entry goes back on the heap
+        while pending := held.get(host):
+            due, site = pending.popleft()
+            if not pending:
+                del held[host]
+            state = states.get(site)
+            if state and state.due == due:
+                heapq.heappush(schedule, (due, site))
+                return
+
+    def plan(site: str, due: float):
+        states[site].due = due
+        heapq.heappush(schedule, (due, site))
+
+    def reload_sites():
+        nonlocal modified
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        if stamp == modified:
+            return
+        modified = stamp
+        sites = set(WebsiteReader(path))
+        for site in states.keys() - sites:
+            # its pending schedule entry is skipped when it comes up
+            del states[site]
+        now = time.monotonic()
+        for site in sites - states.keys():
+            states[site] = SiteState(interval)
+            # spread the first round out a little instead of one burst
+            plan(site, now + random.uniform(0, min(interval, 5)))
+        print(f"Monitoring {len(states)} websites from {path}")
+
+    try:
+        with session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                now = time.monotonic()
+                if now >= next_reload:
+                    reload_sites()
+                    next_reload = now + RELOAD_CHECK
+
+                while schedule and schedule[0][0] <= now:
+                    due, site = heapq.heappop(schedule)
+                    state = states.get(site)
+                    # entries of removed sites, or left over from an earlier add, are stale
+                    if not state or state.due != due:
+                        continue
+                    host = urlsplit(site).hostname
+                    if active.get(host, 0) >= per_host:
+                        # held until one of the host's checks finishes, so a slow
+                        # host never has workers waiting on it while other sites are due
+                        held.setdefault(host, deque()).append((due, site))
+                        continue
+                    active[host] = active.get(host, 0) + 1
+                    running[executor.submit(check, site)] = site
+
+                wake = min(schedule[0][0] if schedule else next_reload, next_reload)
+                done, _ = wait(running, timeout=max(0.0, wake - time.monotonic()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    site = running.pop(future)
+                    host = urlsplit(site).hostname
+                    active[host] -= 1
+                    if not active[host]:
+                        del active[host]
+                    release(host)
+                    result = future.result()
+                    print(result.describe())
+                    store.write(time.time(), result)
+                    state = states.get(site)
+                    if state:
+                        state.record(not result.error)
+                        plan(site, time.monotonic() + state.next_delay())
+    except KeyboardInterrupt:
+        print("\nMonitor stopped")
+    finally:
+        store.close()
 
 def main():
-    sites = get_websites(csv_path)
-    user_agent = get_user_agent()
-    results = []
+    parser = argparse.ArgumentParser(description="Check the status of every website in a CSV file")
+    parser.add_argument('csv_path', nargs='?', default=csv_path, help=f"Input CSV (default: {csv_path})")
+    parser.add_argument('-o', '--output', default=output_path, help=f"Report CSV (default: {output_path})")
+    parser.add_argument('--json', help="Also write results and percentiles to this JSON file")
+    parser.add_argument('--prometheus', help="Also write metrics to this Prometheus textfile")
+    parser.add_argument('-c', '--concurrency', type=int, default=CONCURRENCY,
+                        help=f"Websites checked at once (default: {CONCURRENCY})")
+    parser.add_argument('--per-host', type=int, default=PER_HOST_LIMIT,
+                        help=f"Connections allowed to the same host at once (default: {PER_HOST_LIMIT})")
+    parser.add_argument('-t', '--timeout', type=float, default=TIMEOUT,
+                        help=f"Seconds to wait for each site (default: {TIMEOUT})")
+    parser.add_argument('--dns-ttl', type=float, default=DNS_TTL,
+                        help=f"Seconds to reuse a resolved address (default: {DNS_TTL})")
+    parser.add_argument('--probe', nargs='?', type=int, const=PROBE_BYTES, metavar='BYTES',
+                        help="Send HEAD first and, if a site rejects it, GET at most BYTES of the body "
+                             f"(default: {PROBE_BYTES})")
+    parser.add_argument('--cache', help="Keep ETag/Last-Modified per site in this JSON file and send "
+                                        "conditional requests, so unchanged pages answer 304")
+    parser.add_argument('--ua-strategy', choices=UA_STRATEGIES, default='fixed',
+                        help="Use the first user agent, cycle through them, or pick one per request (default: fixed)")
+    parser.add_argument('--user-agents', metavar='FILE',
+                        help=f"File with one user agent per line (default: {USER_AGENT_CACHE} if it exists, "
+                             "else a small bundled list)")
+    parser.add_argument('--fake-useragent', action='store_true',
+                        help="Refresh the user agent list from fake_useragent and save it to --user-agents "
+                             f"(default: {USER_AGENT_CACHE}) for later offline runs")
+    parser.add_argument('--monitor', action='store_true',
+                        help="Keep running and check every site on its own schedule")
+    parser.add_argument('--interval', type=float, default=MONITOR_INTERVAL,
+                        help=f"Seconds between checks of a healthy site in monitor mode (default: {MONITOR_INTERVAL})")
+    parser.add_argument('--store', default='website_monitor.csv',
+                        help="Monitor results log; a .db/.sqlite path stores them in SQLite instead "
+                             "(default: website_monitor.csv)")
+    args = parser.parse_args()
+    if args.probe is not None and args.probe < 1:
+        parser.error("--probe needs at least 1 byte")
+
+    dns_cache.ttl = args.dns_ttl
+    validators = load_validators(args.cache) if args.cache else None
+    user_agents = UserAgentProvider(args.ua_strategy, args.user_agents, args.fake_useragent)
+
+    if args.monitor:
+        try:
+            monitor(args.csv_path, args.store, user_agents, args.interval, args.concurrency, args.per_host,
+                    args.timeout, args.probe, validators)
+        finally:
+            if args.cache:
+                save_validators(args.cache, validators)
+        return
 
-    for site in sites:
-        result = check_website(site, user_agent)
-        print(result)
-        results.append(result)
+    sites = WebsiteReader(args.csv_path)
+    results = []
 
-    with open('website_status.csv', 'w', newline='', encoding='utf-8') as file:
+    with open(args.output, 'w', newline='', encoding='utf-8') as file:
         writer = csv.writer(file)
-        writer.writerow(['Website', 'Status'])
-        for line in results:
-            site, status = line.split(' -> ', 1) if '->' in line else (line, '')
-            writer.writerow([site, status])
+        writer.writerow(REPORT_HEADER)
+
+        for result in check_websites(sites, user_agents, args.concurrency, args.per_host, args.timeout,
+                                     args.probe, validators):
+            print(result.describe())
+            writer.writerow(csv_row(result))
+            file.flush()
+            results.append(result)
+
+    if args.cache:
+        save_validators(args.cache, validators)
+
+    summary = summarize(results)
+    print_summary(results, summary)
+    if sites.duplicates or sites.invalid:
+        print(f"Skipped {sites.duplicates} duplicate and {sites.invalid} invalid rows of {sites.rows}")
+
+    if args.json:
+        write_json(args.json, results, summary)
+    if args.prometheus:
+        write_prometheus(args.prometheus, results, summary)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,170 @@
+import threading
+import time
+import pytest
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from website_checker import (
+    normalize_url, WebsiteReader, percentile, summarize, SiteState, CheckResult,
+    check_website, check_websites, MIN_INTERVAL, MAX_BACKOFF
+)
+
+PAGE = b"<html>" + bytes(300 * 1024)
+in_flight = Counter()
+most_in_flight = Counter()
+lock = threading.Lock()
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        # /norange is a server that supports neither HEAD nor Range
+        if self.path.startswith("/norange"):
+            self.send_response(405)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_page(PAGE, body=False)
+
+    def do_GET(self):
+        host = self.headers["Host"].rpartition(":")[0]
+        with lock:
+            in_flight[host] += 1
+            most_in_flight[host] = max(most_in_flight[host], in_flight[host])
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.5)
+            self.send_page(PAGE if self.path.startswith("/norange") else b"ok")
+        finally:
+            with lock:
+                in_flight[host] -= 1
+
+    def send_page(self, page: bytes, body: bool = True):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        if body:
+            self.wfile.write(page)
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.mark.parametrize("url, normalized", [
+    ("example.com", "https://example.com/"),
+    ("  HTTP://Example.COM:80/path/  ", "http://example.com/path"),
+    ("https://example.com:443//", "https://example.com/"),
+    ("https://example.com:8443/a?q=1", "https://example.com:8443/a?q=1"),
+    ("https://bücher.de", "https://xn--bcher-kva.de/"),
+    ("http://[::1]:8080/", "http://[::1]:8080/"),
+])
+def test_normalize_url(url, normalized):
+    assert normalize_url(url) == normalized
+
+@pytest.mark.parametrize("url", ["", "   ", "ftp://example.com", "https://", "https://example.com:99999"])
+def test_normalize_url_rejects_invalid(url):
+    assert normalize_url(url) is None
+
+def test_reader_skips_duplicates_and_invalid_rows(tmp_path):
+    sites = tmp_path / "websites.csv"
+    sites.write_text("1,example.com\n2,https://EXAMPLE.com:443/\n\n3,ftp://example.com\n4,example.org/\n")
+    reader = WebsiteReader(str(sites))
+
+    assert list(reader) == ["https://example.com/", "https://example.org/"]
+    assert (reader.rows, reader.duplicates, reader.invalid) == (4, 1, 1)
+
+def test_percentile_interpolates():
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile([4, 1, 3, 2], 0) == 1
+    assert percentile([4, 1, 3, 2], 100) == 4
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+def test_summarize_leaves_out_unreachable_sites():
+    results = [
+        CheckResult("https://a/", dns=0.0, connect=0.1, tls=0.2, ttfb=0.3, total=0.4),
+        CheckResult("https://b/", dns=0.0, connect=0.3, tls=0.4, ttfb=0.5, total=0.6),
+        CheckResult("https://c/", error="ConnectTimeout", total=5.0),
+    ]
+    summary = summarize(results)
+
+    assert summary["total"]["p50"] == pytest.approx(0.5)
+    assert summary["total"]["p99"] == pytest.approx(0.598)
+    assert set(summary) == {"dns", "connect", "tls", "ttfb", "total"}
+
+def test_site_state_backs_off_while_down():
+    state = SiteState(60)
+    assert state.next_delay() == 60
+    state.record(False)
+    assert state.next_delay() == 60
+    state.record(False)
+    assert state.next_delay() == 120
+    for _ in range(20):
+        state.record(False)
+    assert state.next_delay() == MAX_BACKOFF
+    state.record(True)
+    assert state.next_delay() == 60
+
+def test_site_state_watches_flapping_site_closely():
+    state = SiteState(60)
+    for up in (True, False, True):
+        state.record(up)
+    assert not state.flapping()
+    state.record(False)
+    assert state.flapping()
+    assert state.next_delay() == max(MIN_INTERVAL, 60 / 4)
+
+def test_check_websites_caps_each_host(server):
+    # "localhost" and "127.0.0.1" are two hosts to the checker
+    other = server.replace("127.0.0.1", "localhost")
+    sites = [f"{server}/slow/{i}" for i in range(3)] + [f"{other}/slow/{i}" for i in range(3)]
+    most_in_flight.clear()
+
+    start = time.perf_counter()
+    results = list(check_websites(sites, lambda: "test", concurrency=6, per_host=1))
+
+    assert sorted(result.website for result in results) == sorted(sites)
+    assert all(result.status_code == 200 for result in results)
+    assert most_in_flight == {"127.0.0.1": 1, "localhost": 1}
+    # both hosts were checked side by side: three rounds, not six
+    assert time.perf_counter() - start < 2.5
+
+def test_check_websites_yields_results_as_they_complete(server):
+    other = server.replace("127.0.0.1", "localhost")
+    sites = [f"{server}/slow/first", f"{other}/fast", "http://nope.invalid/"]
+
+    start = time.perf_counter()
+    results = []
+    for result in check_websites(sites, lambda: "test", concurrency=3):
+        results.append((result.website, time.perf_counter() - start))
+    finished = dict(results)
+
+    # the first row is the slow one, yet every other result comes before it
+    assert results[-1][0] == f"{server}/slow/first"
+    assert finished[f"{other}/fast"] < 0.5
+    # the unresolvable host fails at once instead of waiting for a worker or a timeout
+    assert finished["http://nope.invalid/"] < 0.5
+
+def test_unresolvable_host_is_reported_as_an_error():
+    [result] = check_websites(["http://nope.invalid/"], lambda: "test")
+    assert result.error
+    assert result.status_code is None
+
+def test_probe_reads_at_most_the_probe(server):
+    # HEAD is rejected and Range ignored, so the GET is cut off after the probe
+    result = check_website(f"{server}/norange", "test", probe=1000)
+
+    assert (result.status_code, result.method, result.size) == (200, "GET range", 1000)
+    assert result.transferred < 10_000
+
+def test_probe_uses_head_when_supported(server):
+    result = check_website(f"{server}/page", "test", probe=1000)
+    assert (result.status_code, result.method, result.size) == (200, "HEAD", 0)
@@ -1,20 +1,144 @@
+import argparse
+import bisect
+import hashlib
 import itertools
+import json
+import math
+import mmap
+import multiprocessing
+import os
 import string
 import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+CHUNK_SIZE = 200_000
+MASK_CHARSETS = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "s": " " + string.punctuation,
+    "a": string.ascii_lowercase + string.ascii_uppercase + string.digits + " " + string.punctuation,
+}
+TASK_PREFIXES = 16
+CHECKPOINT_INTERVAL = 10
+PROGRESS_INTERVAL = 1
+HASH_ALGORITHMS = ("md5", "sha1", "sha256", "pbkdf2")
+PBKDF2_ITERATIONS = 100_000
+BLOOM_ERROR = 1e-6
+# memory the cross-word filter may take; above it only repeats within a word are dropped
+BLOOM_MAX_BITS = 1 << 31
+RULE_ARGUMENTS = {
+    ":": 0, "l": 0, "u": 0, "c": 0, "C": 0, "t": 0, "r": 0, "d": 0, "f": 0, "[": 0, "]": 0,
+    "T": 1, "D": 1, "$": 1, "^": 1, "@": 1, "s": 2,
+}
+INDEX_MAGIC = b"BFIDX1\0\0"
+RANK_BITS = 28
+RANK_MASK = (1 << RANK_BITS) - 1
+# index entries are bucketed by their top byte while the list is read
+INDEX_BUCKET_SHIFT = 56
+
+index_cache = {}
+
+
+def password_key(password: bytes) -> int:
+    # top bits: hash of the password, low RANK_BITS bits: free for its line number
+    digest = hashlib.blake2b(password, digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> RANK_BITS << RANK_BITS
+
+
+def file_signature(filename: str) -> array:
+    stat = os.stat(filename)
+    return array("Q", [stat.st_size, stat.st_mtime_ns])
+
+
+def build_password_index(filename: str) -> str:
+    # sorted (hash | rank) entries for lookups, plus line offsets by rank so a
+    # hit can be checked against the real line
+    buckets = [array("Q") for _ in range(1 << (64 - INDEX_BUCKET_SHIFT))]
+    offsets = array("Q", [0])
+    position = 0
+
+    with open(filename, "rb") as file:
+        for rank, line in enumerate(file):
+            if rank > RANK_MASK:
+                raise ValueError(f"{filename} has more than {RANK_MASK + 1:,} lines")
+            entry = password_key(line.rstrip(b"\r\n")) | rank
+            buckets[entry >> INDEX_BUCKET_SHIFT].append(entry)
+            position += len(line)
+            offsets.append(position)
+
+    path = f"{filename}.idx"
+    with open(path, "wb") as file:
+        file.write(INDEX_MAGIC)
+        file_signature(filename).tofile(file)
+        array("Q", [len(offsets) - 1]).tofile(file)
+        # the keys are hashes, so the buckets are about even; sorting one at a
+        # time keeps the list of Python ints small instead of one per line
+        for number, bucket in enumerate(buckets):
+            array("Q", sorted(bucket)).tofile(file)
+            buckets[number] = None
+        offsets.tofile(file)
+
+    return path
+
+
+def open_password_index(filename: str):
+    # mmaps the index once per process and reuses it until the wordlist changes
+    signature = file_signature(filename)
+    cached = index_cache.get(filename)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    path = f"{filename}.idx"
+    header = bytearray()
+    if os.path.exists(path):
+        with open(path, "rb") as file:
+            header = file.read(len(INDEX_MAGIC) + 24)
+    if header[:len(INDEX_MAGIC)] != INDEX_MAGIC or header[len(INDEX_MAGIC):-8] != signature.tobytes():
+        build_password_index(filename)
+
+    if not signature[0]:
+        index_cache[filename] = (signature, None)
+        return None
+
+    with open(filename, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    with open(path, "rb") as file:
+        index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    values = memoryview(index)[len(INDEX_MAGIC):].cast("Q")
+    count = values[2]
+    entries = values[3:3 + count]
+    offsets = values[3 + count:]
+
+    index_cache[filename] = (signature, (entries, offsets, data))
+    return entries, offsets, data
+
 
 def common_guess(password :str, filename = "passwords.txt"):
     try:
-        with open(filename, "r", encoding= "utf-8") as file:
-            password_list = file.read().splitlines()
+        password_index = open_password_index(filename)
 
     except FileNotFoundError:
         print("file does not exist!")
         return None
-    
-    for i, match in enumerate(password_list, start=1):
-        if match == password:
-            return f"Common match: {match} (#{i})"
-        
+
+    if password_index is None:
+        return None
+
+    entries, offsets, data = password_index
+    target = password.encode("utf-8")
+    key = password_key(target)
+
+    position = bisect.bisect_left(entries, key)
+    while position < len(entries) and entries[position] & ~RANK_MASK == key:
+        rank = entries[position] & RANK_MASK
+        position += 1
+        if data[offsets[rank]:offsets[rank + 1]].rstrip(b"\r\n") == target:
+            return f"Common match: {password} (#{rank + 1})"
+
+
 def brute_force(word: str, length: int, digits: False, Symbols: False) -> str | None:
     # performs brute force action on finding a word
 
@@ -36,17 +160,685 @@ def brute_force(word: str, length: int, digits: False, Symbols: False) -> str |
         if guess == word:
             return f"{word} was cracked in {attempts:,} attempts"
         
+def build_chars(digits: bool, Symbols: bool) -> str:
+    chars : str = string.ascii_lowercase
+
+    if digits:
+        chars += string.digits
+
+    if Symbols:
+        chars += string.punctuation
+
+    return chars
+
+
+def index_to_candidate(index: int, charsets: list[str]) -> str:
+    # same order as itertools.product: the last position changes fastest
+    candidate = []
+    for chars in reversed(charsets):
+        index, position = divmod(index, len(chars))
+        candidate.append(chars[position])
+    return "".join(reversed(candidate))
+
+
+def parse_mask(mask: str, custom: dict[str, str] | None = None) -> list[str]:
+    # hashcat-style mask: ?l ?u ?d ?s ?a, ?1-?4 for custom charsets, ?? for "?",
+    # anything else is a literal character; returns one charset per position
+    custom = custom or {}
+    charsets = []
+    position = 0
+    while position < len(mask):
+        char = mask[position]
+        position += 1
+        if char != "?":
+            charsets.append(char)
+            continue
+
+        key = mask[position:position + 1]
+        position += 1
+        if not key:
+            raise ValueError(f"Mask {mask!r} ends with a lone ?")
+        if key == "?":
+            charsets.append("?")
+        elif key in MASK_CHARSETS:
+            charsets.append(MASK_CHARSETS[key])
+        elif key in custom:
+            charsets.append(custom[key])
+        else:
+            raise ValueError(f"Unknown mask placeholder ?{key} in {mask!r}")
+
+    return charsets
+
+
+def custom_charset(definition: str) -> str:
+    # a custom charset may use placeholders too, e.g. "?l?d_"
+    return "".join(dict.fromkeys("".join(parse_mask(definition))))
+
+
+def split_keyspace(charsets: list[str], chunk_size: int = CHUNK_SIZE) -> int:
+    # how many trailing positions each chunk enumerates with itertools.product
+    suffix_length = 0
+    size = 1
+    while suffix_length < len(charsets):
+        next_size = size * len(charsets[-1 - suffix_length])
+        if next_size > chunk_size and suffix_length:
+            break
+        size = next_size
+        suffix_length += 1
+    return suffix_length
+
+
+stop_event = None
+shared_args = ()
+
+
+def init_worker(event, args: tuple = ()):
+    # the stop flag and the (possibly large) target data are sent once per process
+    global stop_event, shared_args
+    stop_event = event
+    shared_args = args
+
+
+def run_worker(worker, charsets: list[str], suffix_length: int, first: int, last: int):
+    return worker(*shared_args, charsets, suffix_length, first, last)
+
+
+def search_chunks(word: str, charsets: list[str], suffix_length: int, first: int, last: int) -> tuple[list, int]:
+    # checks prefixes first..last-1, each followed by every suffix; returns the
+    # match with its attempt number within this length and how many were checked
+    prefix_sets = charsets[:len(charsets) - suffix_length]
+    suffix_sets = charsets[len(charsets) - suffix_length:]
+    chunk_size = math.prod(len(chars) for chars in suffix_sets)
+
+    target = tuple(word)
+    target_prefix = target[:len(prefix_sets)]
+    target_suffix = target[len(prefix_sets):]
+    checked = 0
+
+    for prefix_index in range(first, last):
+        if stop_event is not None and stop_event.is_set():
+            break
+
+        prefix = tuple(index_to_candidate(prefix_index, prefix_sets))
+        for offset, guess in enumerate(itertools.product(*suffix_sets)):
+            if guess == target_suffix and prefix == target_prefix:
+                return [(word, word, prefix_index * chunk_size + offset + 1)], checked + offset + 1
+
+        checked += chunk_size
+
+    return [], checked
+
+
+def checkpoint_settings(fingerprint: bytes, stages: list[list[str]], salt: bytes | None = None) -> dict:
+    # the search is identified by a salted PBKDF2 of fingerprint, so the file
+    # never holds a fast, unsalted hash of the password being searched for
+    salt = os.urandom(16) if salt is None else salt
+    digest = hashlib.pbkdf2_hmac("sha256", fingerprint, salt, PBKDF2_ITERATIONS)
+    return {"salt": salt.hex(), "fingerprint": digest.hex(), "stages": stages}
+
+
+def load_checkpoint(checkpoint: str | None, fingerprint: bytes, stages: list[list[str]]) -> dict:
+    state = {"settings": None, "stage": 0, "index": 0, "found": []}
+    if not checkpoint:
+        return state
+
+    if os.path.exists(checkpoint):
+        with open(checkpoint, "r", encoding="utf-8") as file:
+            saved = json.load(file)
+        salt = bytes.fromhex(saved.get("settings", {}).get("salt", ""))
+        if salt and saved["settings"] == checkpoint_settings(fingerprint, stages, salt):
+            return saved
+        print("Checkpoint belongs to a different search, starting over")
+
+    state["settings"] = checkpoint_settings(fingerprint, stages)
+    return state
+
+
+def save_checkpoint(checkpoint: str | None, settings: dict, stage: int, index: int, found: dict):
+    if not checkpoint:
+        return
+
+    state = {
+        "settings": settings,
+        "stage": stage,
+        "index": index,
+        "found": [[key, password, attempts] for key, (password, attempts) in found.items()],
+    }
+    # write then rename, so a kill mid-write never leaves a broken checkpoint
+    with open(f"{checkpoint}.tmp", "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(f"{checkpoint}.tmp", checkpoint)
+
+
+def format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+
+def length_stages(chars: str, min_length: int, max_length: int) -> list[list[str]]:
+    return [[chars] * length for length in range(max(min_length, 1), max_length + 1)]
+
+
+def keyspace_size(charsets: list[str]) -> int:
+    return math.prod(len(chars) for chars in charsets)
+
+
+def measure_rate(worker, worker_args: tuple, charsets: list[str], budget: float = 0.5) -> float:
+    # candidates/sec of a single process, timed on a growing tail of the keyspace
+    for suffix_length in range(1, len(charsets) + 1):
+        start = time.perf_counter()
+        _, checked = worker(*worker_args, charsets[-suffix_length:], suffix_length, 0, 1)
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget / 10 or suffix_length == len(charsets):
+            return checked / elapsed if elapsed else float("inf")
+
+
+def keyspace_search(worker, worker_args: tuple, targets: int, stages: list[list[str]],
+                    workers: int | None = None, checkpoint: str | None = None, fingerprint: bytes = b"",
+                    progress: bool = False) -> tuple[dict, float]:
+    # runs worker over every candidate of every stage (a list of per-position
+    # charsets) in order; returns {target: (password, attempts)} and the candidates/sec reached
+    workers = workers or os.cpu_count() or 1
+    state = load_checkpoint(checkpoint, fingerprint, stages)
+    settings = state["settings"]
+    found = {key: (password, attempts) for key, password, attempts in state["found"]}
+
+    total = sum(keyspace_size(charsets) for charsets in stages)
+    offset = sum(keyspace_size(charsets) for charsets in stages[:state["stage"]])
+    done = offset + state["index"]
+    checked = 0
+
+    if progress and stages:
+        rate = measure_rate(worker, worker_args, stages[-1]) * workers
+        print(f"Keyspace: {total:,} candidates, estimated {format_eta(total / rate)} "
+              f"at ~{rate:,.0f} candidates/sec on {workers} workers")
+
+    start_time = last_save = last_report = time.perf_counter()
+
+    event = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(event, worker_args)) as executor:
+        for stage in range(state["stage"], len(stages)):
+            charsets = stages[stage]
+            length = len(charsets)
+            suffix_length = split_keyspace(charsets)
+            chunk_size = keyspace_size(charsets[length - suffix_length:])
+            prefixes = keyspace_size(charsets[:length - suffix_length])
+            step = max(1, min(TASK_PREFIXES, prefixes // (workers * 8)))
+
+            resume = state["index"] // chunk_size if stage == state["stage"] else 0
+            starts = iter(range(resume, prefixes, step))
+            pending = {}
+            completed = set()
+            low = resume
+
+            def refill():
+                while len(pending) < workers * 2 and (first := next(starts, None)) is not None:
+                    last = min(first + step, prefixes)
+                    pending[executor.submit(run_worker, worker, charsets, suffix_length, first, last)] = first
+
+            try:
+                refill()
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        completed.add(pending.pop(future))
+                        matches, candidates = future.result()
+                        checked += candidates
+                        for key, password, attempts in matches:
+                            attempts += offset
+                            if key not in found or attempts < found[key][1]:
+                                found[key] = (password, attempts)
+
+                    # everything before low is finished, so it is a safe place to resume
+                    while low in completed:
+                        completed.remove(low)
+                        low = min(low + step, prefixes)
+
+                    if len(found) == targets:
+                        event.set()
+                        executor.shutdown(cancel_futures=True)
+                        if checkpoint and os.path.exists(checkpoint):
+                            os.remove(checkpoint)
+                        if progress:
+                            print()
+                        return found, checked / (time.perf_counter() - start_time)
+
+                    now = time.perf_counter()
+                    if now - last_save >= CHECKPOINT_INTERVAL:
+                        save_checkpoint(checkpoint, settings, stage, low * chunk_size, found)
+                        last_save = now
+
+                    if progress and now - last_report >= PROGRESS_INTERVAL:
+                        last_report = now
+                        rate = checked / (now - start_time)
+                        position = done + checked
+                        eta = format_eta((total - position) / rate) if rate else "?"
+                        print(f"\rLength {length}: {position / total:6.2%} "
+                              f"{rate:,.0f} candidates/sec, ETA {eta}", end="", flush=True)
+
+                    refill()
+
+            except KeyboardInterrupt:
+                save_checkpoint(checkpoint, settings, stage, low * chunk_size, found)
+                raise
+
+            offset += keyspace_size(charsets)
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    if progress:
+        print()
+    elapsed = time.perf_counter() - start_time
+    return found, checked / elapsed if elapsed else 0.0
+
+
+def parallel_brute_force(word: str, length: int, digits: bool = False, Symbols: bool = False,
+                         workers: int | None = None, max_length: int | None = None,
+                         checkpoint: str | None = None, progress: bool = False,
+                         mask: list[str] | None = None) -> str | None:
+    # searches every length from length to max_length (just length by default),
+    # or only the candidates of mask when one is given
+    stages = [mask] if mask else length_stages(build_chars(digits, Symbols), length, max_length or length)
+    found, _ = keyspace_search(search_chunks, (word,), 1, stages, workers, checkpoint, word.encode(), progress)
+    if word in found:
+        return f"{word} was cracked in {found[word][1]:,} attempts"
+    return None
+
+
+def hash_password(candidate: bytes, algorithm: str, salt: bytes = b"", iterations: int = PBKDF2_ITERATIONS) -> bytes:
+    if algorithm == "pbkdf2":
+        return hashlib.pbkdf2_hmac("sha256", candidate, salt, iterations)
+    return hashlib.new(algorithm, candidate).digest()
+
+
+def digest_size(algorithm: str) -> int:
+    # pbkdf2 targets are PBKDF2-HMAC-SHA256 keys of the default length
+    return hashlib.new("sha256" if algorithm == "pbkdf2" else algorithm).digest_size
+
+
+def parse_hash(text: str, algorithm: str) -> bytes:
+    # a digest of the wrong length could never match, so the search would run for nothing
+    try:
+        digest = bytes.fromhex(text)
+    except ValueError:
+        raise ValueError(f"{text!r} is not a hex digest") from None
+    if len(digest) != digest_size(algorithm):
+        raise ValueError(f"{text!r} is {len(digest)} bytes long, {algorithm} digests are {digest_size(algorithm)}")
+    return digest
+
+
+def load_hashes(filename: str, algorithm: str) -> set[bytes]:
+    hashes = set()
+    with open(filename, "r", encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                try:
+                    hashes.add(parse_hash(line.strip(), algorithm))
+                except ValueError as e:
+                    raise ValueError(f"{filename}, line {number}: {e}") from None
+    return hashes
+
+
+def hash_chunks(targets: set[bytes], algorithm: str, salt: bytes, iterations: int,
+                charsets: list[str], suffix_length: int, first: int, last: int) -> tuple[list, int]:
+    # hashes prefixes first..last-1 followed by every suffix; the hash state of
+    # everything but the last character is computed once and .copy()'d
+    prefix_sets = charsets[:len(charsets) - suffix_length]
+    middle_sets = [[char.encode() for char in chars] for chars in charsets[len(charsets) - suffix_length:-1]]
+    last_chars = [char.encode() for char in charsets[-1]]
+    chunk_size = math.prod(len(chars) for chars in charsets[len(charsets) - suffix_length:])
+
+    remaining = set(targets)
+    found = []
+    hashed = 0
+
+    for prefix_index in range(first, last):
+        if not remaining or (stop_event is not None and stop_event.is_set()):
+            break
+
+        prefix = index_to_candidate(prefix_index, prefix_sets).encode()
+        attempt = prefix_index * chunk_size
+        seeded = None if algorithm == "pbkdf2" else hashlib.new(algorithm, prefix)
+
+        for middle in itertools.product(*middle_sets):
+            stem = prefix + b"".join(middle)
+            if seeded:
+                stem_hash = seeded.copy()
+                stem_hash.update(b"".join(middle))
+
+            for char in last_chars:
+                attempt += 1
+                if seeded:
+                    candidate_hash = stem_hash.copy()
+                    candidate_hash.update(char)
+                    digest = candidate_hash.digest()
+                else:
+                    digest = hash_password(stem + char, algorithm, salt, iterations)
+
+                if digest in remaining:
+                    remaining.discard(digest)
+                    found.append((digest.hex(), (stem + char).decode(), attempt))
+
+        hashed += chunk_size
+
+    return found, hashed
+
+
+def crack_hashes(targets: set[bytes], length: int, digits: bool = False, Symbols: bool = False,
+                 algorithm: str = "sha256", salt: bytes = b"", iterations: int = PBKDF2_ITERATIONS,
+                 workers: int | None = None, max_length: int | None = None,
+                 checkpoint: str | None = None, progress: bool = False,
+                 mask: list[str] | None = None) -> tuple[dict[bytes, tuple[str, int]], float]:
+    # one pass over the keyspace checks every candidate against the whole target set;
+    # returns {digest: (password, attempts)} and the hashes/sec reached
+    stages = [mask] if mask else length_stages(build_chars(digits, Symbols), length, max_length or length)
+    fingerprint = b"".join(sorted(targets)) + f"{algorithm}:{salt.hex()}:{iterations}".encode()
+    found, rate = keyspace_search(hash_chunks, (targets, algorithm, salt, iterations), len(targets),
+                                  stages, workers, checkpoint, fingerprint, progress)
+    return {bytes.fromhex(key): value for key, value in found.items()}, rate
+
+
+def default_rules() -> list[str]:
+    # capitalisation and leetspeak variants, each with common digit/year/symbol endings
+    leet = "sa@ se3 si1 so0 ss$"
+    bases = [":", "c", "u", leet, f"c {leet}"]
+    endings = [""]
+    endings += [f"${digit}" for digit in string.digits]
+    endings += ["$1 $2", "$1 $2 $3", "$1 $2 $3 $4", "$!", "$! $!", "$@", "$#", "$1 $!"]
+    endings += [" ".join(f"${digit}" for digit in str(year)) for year in range(1990, 2031)]
+    return [f"{base} {ending}".strip() for base in bases for ending in endings]
+
+
+def load_rules(filename: str) -> list[str]:
+    with open(filename, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith("#")]
+
+
+def parse_rule(rule: str) -> list[tuple[str, str]]:
+    # hashcat-style rule, e.g. "c sa@ $1 $9" -> [("c", ""), ("s", "a@"), ("$", "1"), ("$", "9")]
+    operations = []
+    position = 0
+    while position < len(rule):
+        op = rule[position]
+        position += 1
+        if op == " ":
+            continue
+        if op not in RULE_ARGUMENTS:
+            raise ValueError(f"Unknown rule function {op!r} in {rule!r}")
+
+        argument = rule[position:position + RULE_ARGUMENTS[op]]
+        if len(argument) != RULE_ARGUMENTS[op]:
+            raise ValueError(f"Rule function {op!r} is missing its argument in {rule!r}")
+        position += RULE_ARGUMENTS[op]
+        operations.append((op, argument))
+
+    return operations
+
+
+def apply_rule(word: str, operations: list[tuple[str, str]]) -> str:
+    for op, argument in operations:
+        if op == "l":
+            word = word.lower()
+        elif op == "u":
+            word = word.upper()
+        elif op == "c":
+            word = word.capitalize()
+        elif op == "C":
+            word = word[:1].lower() + word[1:].upper()
+        elif op == "t":
+            word = word.swapcase()
+        elif op == "T":
+            n = int(argument, 36)
+            word = word[:n] + word[n:n + 1].swapcase() + word[n + 1:]
+        elif op == "r":
+            word = word[::-1]
+        elif op == "d":
+            word = word + word
+        elif op == "f":
+            word = word + word[::-1]
+        elif op == "[":
+            word = word[1:]
+        elif op == "]":
+            word = word[:-1]
+        elif op == "D":
+            n = int(argument, 36)
+            word = word[:n] + word[n + 1:]
+        elif op == "$":
+            word = word + argument
+        elif op == "^":
+            word = argument + word
+        elif op == "s":
+            word = word.replace(argument[0], argument[1])
+        elif op == "@":
+            word = word.replace(argument, "")
+    return word
+
+
+def iter_words(filename: str):
+    with open(filename, "r", encoding="utf-8", errors="ignore") as file:
+        for line in file:
+            if word := line.rstrip("\r\n"):
+                yield word
+
+
+def mangle(words, rules: list[str]):
+    # lazily yields every rule applied to every word, one word at a time; rules
+    # that give the same candidate for a word (e.g. "c" on "Summer") yield it once
+    compiled = [parse_rule(rule) for rule in rules]
+    for word in words:
+        yield from dict.fromkeys(apply_rule(word, operations) for operations in compiled)
+
+
+def bloom_bits(capacity: int, error: float = BLOOM_ERROR) -> int:
+    return math.ceil(-capacity * math.log(error) / math.log(2) ** 2)
+
+
+class BloomFilter:
+    # set membership with no false negatives, sized for capacity items; a false
+    # positive means a fresh candidate is skipped, about one in 1/error
+    def __init__(self, capacity: int, error: float = BLOOM_ERROR):
+        self.size = bloom_bits(capacity, error)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str) -> bool:
+        # returns False when the item was (probably) added before
+        bits, size = self.bits, self.size
+        first = hash(item) % size
+        step = hash((item, 1)) % size | 1
+        new = False
+        for bit in range(first, first + self.hashes * step, step):
+            bit %= size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        return new
+
+
+def unique(candidates, bloom: BloomFilter):
+    for candidate in candidates:
+        if bloom.add(candidate):
+            yield candidate
+
+
+def count_lines(filename: str) -> int:
+    with open(filename, "rb") as file:
+        return sum(block.count(b"\n") for block in iter(lambda: file.read(1 << 20), b""))
+
+
+def wordlist_candidates(wordlist: str, rules: list[str], algorithm: str | None = None):
+    # every rule applied to every word. A filter add costs more than comparing a
+    # plaintext or a fast hash, so repeats across words (~1.5% of candidates with
+    # the built-in rules) are only dropped ahead of PBKDF2, by a filter sized for
+    # lines x rules unless that would take more than BLOOM_MAX_BITS
+    candidates = mangle(iter_words(wordlist), rules)
+    if algorithm != "pbkdf2":
+        return candidates
+    capacity = max(1, (count_lines(wordlist) + 1) * len(rules))
+    if bloom_bits(capacity) > BLOOM_MAX_BITS:
+        return candidates
+    return unique(candidates, BloomFilter(capacity))
+
+
+def hybrid_attack(targets: set, candidates, algorithm: str | None = None, salt: bytes = b"",
+                  iterations: int = PBKDF2_ITERATIONS) -> tuple[dict, int]:
+    # targets are plaintext passwords, or raw digests when algorithm is given;
+    # returns {target: (password, attempts)} and the number of candidates tried
+    found = {}
+    attempts = 0
+    for candidate in candidates:
+        attempts += 1
+        key = hash_password(candidate.encode(), algorithm, salt, iterations) if algorithm else candidate
+        if key in targets and key not in found:
+            found[key] = (candidate, attempts)
+            if len(found) == len(targets):
+                break
+    return found, attempts
+
+
+def dictionary_guess(password: str, wordlist: str, rules: list[str]) -> str | None:
+    found, _ = hybrid_attack({password}, wordlist_candidates(wordlist, rules))
+    if password in found:
+        return f"{password} was cracked in {found[password][1]:,} attempts (dictionary + rules)"
+    return None
+
+
+def sweep_attempts(password: str, chars: str, min_length: int, max_length: int) -> int | None:
+    # the attempt number at which the exhaustive sweep would reach password
+    if not min_length <= len(password) <= max_length or any(char not in chars for char in password):
+        return None
+
+    index = 0
+    for char in password:
+        index = index * len(chars) + chars.index(char)
+    shorter = sum(len(chars) ** length for length in range(min_length, len(password)))
+    return shorter + index + 1
+
+
+def benchmark_hybrid(corpus: str, wordlist: str, rules: list[str], chars: str,
+                     min_length: int, max_length: int) -> dict[str, int]:
+    # cracks a corpus of known plaintexts with the dictionary+rules pipeline, then
+    # counts what the exhaustive sweep gets with the same number of attempts
+    targets = set(iter_words(corpus))
+    found, attempts = hybrid_attack(targets, wordlist_candidates(wordlist, rules))
+
+    swept = 0
+    for password in targets:
+        position = sweep_attempts(password, chars, min_length, max_length)
+        if position is not None and position <= attempts:
+            swept += 1
+
+    return {"corpus": len(targets), "attempts": attempts, "hybrid": len(found), "sweep": swept}
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Crack a password or a list of password hashes")
+    parser.add_argument("--hash", help="Target hash (hex)")
+    parser.add_argument("--hash-file", help="File with one target hash (hex) per line")
+    parser.add_argument("-a", "--algorithm", choices=HASH_ALGORITHMS, default="sha256",
+                        help="Hash algorithm of the targets (default: sha256)")
+    parser.add_argument("--salt", default="", help="PBKDF2 salt (hex)")
+    parser.add_argument("--iterations", type=int, default=PBKDF2_ITERATIONS,
+                        help=f"PBKDF2 iterations (default: {PBKDF2_ITERATIONS})")
+    parser.add_argument("-l", "--length", type=int, help="Only try this exact password length")
+    parser.add_argument("--min-length", type=int, default=1, help="Shortest password length to try (default: 1)")
+    parser.add_argument("--max-length", type=int, default=5, help="Longest password length to try (default: 5)")
+    parser.add_argument("-w", "--workers", type=int, help="Number of worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default="brute-force.checkpoint",
+                        help="Progress file used to resume an interrupted search (default: brute-force.checkpoint)")
+    parser.add_argument("-m", "--mask", help="Only try candidates of this shape, e.g. ?u?l?l?l?l?l?d?d")
+    for i in range(1, 5):
+        parser.add_argument(f"-{i}", f"--custom-charset{i}", help=f"Custom charset used as ?{i} in the mask")
+    parser.add_argument("--hybrid", action="store_true",
+                        help="Try the wordlist with mangling rules before the exhaustive sweep")
+    parser.add_argument("--wordlist", default="passwords.txt", help="Wordlist for the hybrid attack (default: passwords.txt)")
+    parser.add_argument("--rules", help="Hashcat-style rule file for the hybrid attack (default: built-in rules)")
+    parser.add_argument("--benchmark-corpus",
+                        help="File of known plaintexts: compare the hybrid attack with the sweep and exit")
+    args = parser.parse_args()
+
+    if args.length:
+        args.min_length = args.max_length = args.length
+
+    rules = load_rules(args.rules) if args.rules else default_rules()
+    mask = None
+    if args.mask:
+        try:
+            custom = {
+                str(i): custom_charset(definition)
+                for i in range(1, 5)
+                if (definition := getattr(args, f"custom_charset{i}"))
+            }
+            mask = parse_mask(args.mask, custom)
+        except ValueError as e:
+            parser.error(str(e))
+    chars = build_chars(digits=True, Symbols=False)
+
+    if args.benchmark_corpus:
+        result = benchmark_hybrid(args.benchmark_corpus, args.wordlist, rules, chars, args.min_length, args.max_length)
+        print(f"Hybrid: cracked {result['hybrid']:,} of {result['corpus']:,} in {result['attempts']:,} attempts")
+        print(f"Sweep:  cracked {result['sweep']:,} of {result['corpus']:,} in the same number of attempts")
+        return
+
+    if args.hash or args.hash_file:
+        try:
+            if args.hash_file:
+                targets = load_hashes(args.hash_file, args.algorithm)
+            else:
+                targets = {parse_hash(args.hash, args.algorithm)}
+        except ValueError as e:
+            parser.error(str(e))
+        except OSError as e:
+            parser.error(f"cannot read {args.hash_file}: {e.strerror}")
+        try:
+            salt = bytes.fromhex(args.salt)
+        except ValueError:
+            parser.error(f"--salt {args.salt!r} is not hex")
+        print(f"Searching for {len(targets):,} {args.algorithm} hashes...")
+
+        cracked = {}
+        if args.hybrid:
+            candidates = wordlist_candidates(args.wordlist, rules, args.algorithm)
+            cracked, _ = hybrid_attack(targets, candidates, args.algorithm, salt, args.iterations)
+            print(f"Dictionary + rules cracked {len(cracked):,} of {len(targets):,} hashes")
+
+        swept, rate = {}, None
+        if remaining := targets - cracked.keys():
+            swept, rate = crack_hashes(remaining, args.min_length, digits=True, Symbols=False,
+                                       algorithm=args.algorithm, salt=salt,
+                                       iterations=args.iterations, workers=args.workers,
+                                       max_length=args.max_length, checkpoint=args.checkpoint, progress=True,
+                                       mask=mask)
+
+        for digest, (password, attempts) in cracked.items():
+            print(f"{digest.hex()} -> {password} (dictionary + rules, {attempts:,} attempts)")
+        for digest, (password, attempts) in sorted(swept.items(), key=lambda item: item[1][1]):
+            print(f"{digest.hex()} -> {password} (cracked in {attempts:,} attempts)")
+        cracked.update(swept)
+        print(f"Cracked {len(cracked):,} of {len(targets):,} hashes", end="")
+        print(f" at {rate:,.0f} hashes/sec" if rate is not None else "")
+        return
+
     print("Searching...")
-    input_password = input("Please Enter your password( 5 word for now) to be cracked: ")
+    if mask:
+        input_password = input(f"Please Enter your password( mask {args.mask}) to be cracked: ")
+    else:
+        input_password = input(f"Please Enter your password( {args.min_length}-{args.max_length} characters) to be cracked: ")
 
     start_time = time.perf_counter()
 
     if common_password := common_guess(input_password):
         print(common_password)
 
+    elif args.hybrid and (mangled := dictionary_guess(input_password, args.wordlist, rules)):
+        print(mangled)
+
     else:
-        if cracked := brute_force(input_password, length= 5, digits= True, Symbols= False):
+        if cracked := parallel_brute_force(input_password, length= args.min_length, digits= True, Symbols= False,
+                                           workers= args.workers, max_length= args.max_length,
+                                           checkpoint= args.checkpoint, progress= True, mask= mask):
             print(cracked)
 
         else:
@@ -58,4 +850,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,180 @@
+import hashlib
+import itertools
+import string
+import pytest
+from brute_force import (
+    brute_force, build_chars, index_to_candidate, parse_mask, custom_charset, split_keyspace,
+    search_chunks, keyspace_search, parallel_brute_force, crack_hashes, parse_hash, load_hashes,
+    sweep_attempts, save_checkpoint, checkpoint_settings, parse_rule, apply_rule, mangle, BloomFilter,
+    wordlist_candidates, common_guess, MASK_CHARSETS
+)
+
+CHARS = build_chars(digits=True, Symbols=False)
+
+def test_index_to_candidate_matches_product_order():
+    charsets = ["ab", "xyz", "01"]
+    candidates = ["".join(guess) for guess in itertools.product(*charsets)]
+    assert [index_to_candidate(i, charsets) for i in range(len(candidates))] == candidates
+
+def test_split_keyspace_keeps_chunks_small():
+    charsets = [CHARS] * 5
+    suffix_length = split_keyspace(charsets, chunk_size=100_000)
+    assert suffix_length == 3
+    assert split_keyspace(["ab"], chunk_size=1) == 1
+
+@pytest.mark.parametrize("word", ["a", "z9", "b7z", "999"])
+def test_parallel_matches_serial_attempts(word):
+    serial = brute_force(word, len(word), digits=True, Symbols=False)
+    assert parallel_brute_force(word, len(word), digits=True, workers=2) == serial
+
+def test_search_chunks_attempt_number():
+    charsets = [CHARS] * 3
+    suffix_length = split_keyspace(charsets, chunk_size=100)
+    prefixes = len(CHARS) ** (3 - suffix_length)
+    matches, _ = search_chunks("k2c", charsets, suffix_length, 0, prefixes)
+    assert matches == [("k2c", "k2c", sweep_attempts("k2c", CHARS, 3, 3))]
+
+def test_lengths_are_searched_shortest_first():
+    expected = sweep_attempts("ab1", CHARS, 1, 4)
+    assert parallel_brute_force("ab1", 1, digits=True, workers=2, max_length=4) == \
+        f"ab1 was cracked in {expected:,} attempts"
+
+def test_crack_hashes_reports_attempts():
+    passwords = ["q7", "zz", "a1b"]
+    targets = {hashlib.sha256(password.encode()).digest() for password in passwords}
+    targets.add(hashlib.sha256(b"not!").digest())
+
+    found, _ = crack_hashes(targets, 1, digits=True, algorithm="sha256", workers=2, max_length=3)
+
+    assert {digest: password for digest, (password, _) in found.items()} == \
+        {hashlib.sha256(password.encode()).digest(): password for password in passwords}
+    for password, attempts in found.values():
+        assert attempts == sweep_attempts(password, CHARS, 1, 3)
+
+def test_parse_hash_checks_hex_and_length():
+    digest = hashlib.md5(b"a").digest()
+    assert parse_hash(digest.hex(), "md5") == digest
+    with pytest.raises(ValueError):
+        parse_hash("zz", "md5")
+    with pytest.raises(ValueError):
+        parse_hash(hashlib.sha256(b"a").hexdigest(), "md5")
+    assert parse_hash(hashlib.sha256(b"a").hexdigest(), "pbkdf2") == hashlib.sha256(b"a").digest()
+
+def test_load_hashes_names_the_bad_line(tmp_path):
+    hashes = tmp_path / "hashes.txt"
+    hashes.write_text(f"{hashlib.sha1(b'a').hexdigest()}\n\nnot-hex\n")
+    with pytest.raises(ValueError, match="line 3"):
+        load_hashes(str(hashes), "sha1")
+
+def test_resume_from_checkpoint_keeps_attempt_numbers(tmp_path):
+    checkpoint = str(tmp_path / "search.checkpoint")
+    stages = [[CHARS] * length for length in (1, 2, 3)]
+    fingerprint = b"resume-test"
+    expected = sweep_attempts("m4x", CHARS, 1, 3)
+
+    # as if lengths 1 and 2 were searched before the run was interrupted
+    save_checkpoint(checkpoint, checkpoint_settings(fingerprint, stages), 2, 0, {})
+    found, _ = keyspace_search(search_chunks, ("m4x",), 1, stages, 2, checkpoint, fingerprint)
+
+    assert found == {"m4x": ("m4x", expected)}
+    assert not (tmp_path / "search.checkpoint").exists()
+
+    # lengths the checkpoint marks as searched are not searched again
+    save_checkpoint(checkpoint, checkpoint_settings(fingerprint, stages), 2, 0, {})
+    found, _ = keyspace_search(search_chunks, ("m4",), 1, stages, 2, checkpoint, fingerprint)
+    assert found == {}
+
+def test_checkpoint_of_another_search_is_ignored(tmp_path):
+    checkpoint = str(tmp_path / "search.checkpoint")
+    stages = [[CHARS] * 2]
+    # this checkpoint claims the whole keyspace was already searched
+    save_checkpoint(checkpoint, checkpoint_settings(b"other", stages), 1, 0, {})
+
+    found, _ = keyspace_search(search_chunks, ("zz",), 1, stages, 2, checkpoint, b"mine")
+
+    assert found == {"zz": ("zz", sweep_attempts("zz", CHARS, 2, 2))}
+
+def test_checkpoint_holds_no_fast_hash_of_the_password():
+    settings = checkpoint_settings(b"zz9", [[CHARS] * 3])
+    assert hashlib.sha256(b"zz9").hexdigest() not in str(settings)
+    # a new salt every time, so equal passwords give different checkpoints
+    assert checkpoint_settings(b"zz9", [[CHARS] * 3])["fingerprint"] != settings["fingerprint"]
+
+def test_parse_mask():
+    assert parse_mask("?u?l?d") == [string.ascii_uppercase, string.ascii_lowercase, string.digits]
+    assert parse_mask("a??b?1", {"1": "xy"}) == ["a", "?", "b", "xy"]
+    assert parse_mask("?a") == [MASK_CHARSETS["a"]]
+    with pytest.raises(ValueError):
+        parse_mask("?x")
+    with pytest.raises(ValueError):
+        parse_mask("?l?")
+
+def test_custom_charset_expands_placeholders():
+    assert custom_charset("?dab1") == string.digits + "ab"
+
+def test_mask_search():
+    mask = parse_mask("?u?l?d")
+    attempts = string.ascii_uppercase.index("X") * 260 + string.ascii_lowercase.index("b") * 10 + 7 + 1
+    assert parallel_brute_force("Xb7", 0, mask=mask, workers=2) == f"Xb7 was cracked in {attempts:,} attempts"
+
+def test_parse_rule():
+    assert parse_rule("c sa@ $1 $9") == [("c", ""), ("s", "a@"), ("$", "1"), ("$", "9")]
+    with pytest.raises(ValueError):
+        parse_rule("x")
+    with pytest.raises(ValueError):
+        parse_rule("$")
+
+@pytest.mark.parametrize("rule, word, result", [
+    (":", "password", "password"),
+    ("c sa@ $1 $9", "password", "P@ssword19"),
+    ("u", "abc", "ABC"),
+    ("C", "abc", "aBC"),
+    ("t", "aBc", "AbC"),
+    ("T1", "abc", "aBc"),
+    ("r", "abc", "cba"),
+    ("d", "ab", "abab"),
+    ("f", "ab", "abba"),
+    ("[ ]", "abcd", "bc"),
+    ("D0", "abc", "bc"),
+    ("^1 ^2", "abc", "21abc"),
+    ("@a", "banana", "bnn"),
+])
+def test_apply_rule(rule, word, result):
+    assert apply_rule(word, parse_rule(rule)) == result
+
+def test_mangle_drops_repeats_within_a_word():
+    assert list(mangle(["Summer", "abc"], [":", "c", "$1"])) == ["Summer", "Summer1", "abc", "Abc", "abc1"]
+
+def test_bloom_filter_sized_for_capacity():
+    bloom = BloomFilter(10_000, error=1e-9)
+    items = [f"candidate{i}" for i in range(10_000)]
+    assert all(bloom.add(item) for item in items)
+    assert not any(bloom.add(item) for item in items)
+
+def test_repeats_across_words_dropped_ahead_of_pbkdf2(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("pass1\npass\n")
+    rules = [":", "$1"]
+
+    assert list(wordlist_candidates(str(wordlist), rules)) == ["pass1", "pass11", "pass", "pass1"]
+    assert list(wordlist_candidates(str(wordlist), rules, "pbkdf2")) == ["pass1", "pass11", "pass"]
+
+def test_common_guess_reports_rank(tmp_path):
+    wordlist = tmp_path / "common.txt"
+    wordlist.write_bytes(b"123456\r\npassword\nqwerty\n")
+
+    assert common_guess("123456", str(wordlist)) == "Common match: 123456 (#1)"
+    assert common_guess("qwerty", str(wordlist)) == "Common match: qwerty (#3)"
+    assert common_guess("letmein", str(wordlist)) is None
+
+def test_common_guess_follows_wordlist_changes(tmp_path):
+    wordlist = tmp_path / "common.txt"
+    wordlist.write_text("123456\npassword\n")
+    assert common_guess("password", str(wordlist)) == "Common match: password (#2)"
+
+    wordlist.write_text("letmein\ndragon\npassword\n")
+    assert common_guess("password", str(wordlist)) == "Common match: password (#3)"
+    assert common_guess("123456", str(wordlist)) is None
+
+def test_common_guess_missing_file(tmp_path):
+    assert common_guess("password", str(tmp_path / "missing.txt")) is None
@@ -1,5 +1,14 @@
+import argparse
+import errno
 import os
 import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+
+BENCHMARK_FILES = 1_000_000
+BENCHMARK_DIRS = 1000
+BENCHMARK_EXTENSIONS = ('.jpg', '.png', '.txt', '.pdf', '.mp3', '.csv', '.py', '.zip', '.docx', '')
 
 def create_folder(path : str, extention : str):
     folder_name = extention[1:]
@@ -24,13 +33,115 @@ def remove_empty_folders(path: str):
             if not os.listdir(dir_path):
                 os.rmdir(dir_path)
 
+@dataclass
+class SortStats:
+    moved: int = 0
+    kept: int = 0
+    folders_created: int = 0
+    folders_removed: int = 0
+    seconds: float = 0.0
+
+def move_file(source: str, target: str):
+    # a rename is a single metadata update; copying is only needed across devices
+    try:
+        os.rename(source, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source, target)
+
+def sort_files(source_path: str) -> SortStats:
+    # one scandir pass: files are moved as they are found and every folder is
+    # removed on the way back up if that left it empty
+    stats = SortStats()
+    start = time.perf_counter()
+    folders = {}
+    created = set()
+    stack = [(source_path, os.scandir(source_path))]
+
+    while stack:
+        path, entries = stack[-1]
+        for entry in entries:
+            if entry.is_dir():
+                # folders made by this run only hold files already sorted
+                if not entry.is_symlink() and entry.path not in created:
+                    stack.append((entry.path, os.scandir(entry.path)))
+                    break
+                continue
+
+            extention = os.path.splitext(entry.name)[1]
+            if not extention:
+                stats.kept += 1
+                continue
+            if extention not in folders:
+                folder = os.path.join(source_path, extention[1:])
+                if not os.path.isdir(folder):
+                    created.add(folder)
+                    stats.folders_created += 1
+                folders[extention] = create_folder(source_path, extention)
+            target = os.path.join(folders[extention], entry.name)
+            if target == entry.path:
+                stats.kept += 1
+                continue
+            move_file(entry.path, target)
+            stats.moved += 1
+        else:
+            entries.close()
+            stack.pop()
+            if stack:
+                # fails, and is skipped, unless the folder is now empty
+                try:
+                    os.rmdir(path)
+                    stats.folders_removed += 1
+                except OSError:
+                    pass
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+def make_tree(path: str, files: int = BENCHMARK_FILES, dirs: int = BENCHMARK_DIRS):
+    # empty files spread over two levels of folders, a few without an extension
+    per_dir = max(1, files // dirs)
+    for d in range(dirs):
+        folder = os.path.join(path, f"group{d % 10}", f"dir{d}")
+        os.makedirs(folder, exist_ok=True)
+        for f in range(min(per_dir, files - d * per_dir)):
+            extention = BENCHMARK_EXTENSIONS[(d + f) % len(BENCHMARK_EXTENSIONS)]
+            open(os.path.join(folder, f"file{f}{extention}"), 'wb').close()
+
+def benchmark(files: int = BENCHMARK_FILES, dirs: int = BENCHMARK_DIRS):
+    with tempfile.TemporaryDirectory() as root:
+        for label in ('os.walk + shutil.move', 'single scandir pass'):
+            path = os.path.join(root, label.split()[0])
+            print(f"Creating {files:,} files in {dirs:,} folders...")
+            make_tree(path, files, dirs)
+
+            start = time.perf_counter()
+            if label.startswith('os.walk'):
+                sort_file(path)
+                remove_empty_folders(path)
+            else:
+                sort_files(path)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>22}: {elapsed:.2f}s ({files / elapsed:,.0f} files/s)")
+            shutil.rmtree(path)
+
 def main():
-    source_path = input("Enter the path to the source directory: ")
-    sort_file(source_path)
-    remove_empty_folders(source_path)
-    print("Sorting complete.")
+    parser = argparse.ArgumentParser(description="Sort files into folders named after their extensions")
+    parser.add_argument('source', nargs='?', help="Folder to sort (asked for when left out)")
+    parser.add_argument('--benchmark', nargs='?', type=int, const=BENCHMARK_FILES, metavar='FILES',
+                        help=f"Compare with the old sorter on a synthetic tree (default: {BENCHMARK_FILES:,} files)")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    main()                
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
 
+    source_path = args.source or input("Enter the path to the source directory: ")
+    stats = sort_files(source_path)
+    print(f"Moved {stats.moved} files into {stats.folders_created} new folders and removed "
+          f"{stats.folders_removed} empty folders in {stats.seconds:.2f}s")
+    print("Sorting complete.")
 
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,661 @@
+import argparse
+import base64
+import contextlib
+import csv
+import hashlib
+import importlib.util
+import itertools
+import json
+import multiprocessing
 import os
+import random
+import threading
+import time
 import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
 
-def get_extensions(image_url: str) -> str | None:
-    extensions: list[str] = ['.png', '.jpg', '.jpeg', '.gif', '.svg']
+CONCURRENCY = 16
+PER_HOST_LIMIT = 4
+RETRIES = 3
+BACKOFF = 0.5
+TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+# how many rows per worker are read from the batch file ahead of time; the
+# rest of the file stays unread until downloads finish
+QUEUE_FACTOR = 4
+# rows read ahead of the downloads at most, when a long run of one host's rows
+# leaves workers idle
+READ_AHEAD_LIMIT = 100_000
+# answers worth another try: throttling and server-side errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# --convert choices and the Pillow format each one is saved as
+SAVE_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG', 'png': 'PNG', 'avif': 'AVIF'}
 
-    for ext in extensions:
-        if ext in image_url:
-            return ext
-        
-def download_image(image_url: str, name: str, folder: str = None):
-    if ext := get_extensions(image_url):
-        if folder:
-            image_name = f"{folder}/{name}{ext}"
+# Content-Type fallbacks when the first bytes match no known signature
+CONTENT_TYPES = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/avif': '.avif',
+    'image/svg+xml': '.svg',
+}
+EXTENSIONS = tuple(CONTENT_TYPES.values())
+
+def detect_extension(head: bytes, content_type: str | None = None) -> str | None:
+    # decided from the first chunk of the body, falling back to the Content-Type header
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return '.gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    if head[4:8] == b'ftyp':
+        # the major brand, then the compatible brands of the ftyp box
+        box_size = int.from_bytes(head[:4], 'big')
+        brands = {head[i:i + 4] for i in range(8, min(box_size, len(head)), 4)}
+        if brands & {b'avif', b'avis'}:
+            return '.avif'
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith((b'<?xml', b'<svg', b'<!--', b'<!doctype svg')) and b'<svg' in text:
+        return '.svg'
+
+    if content_type:
+        return CONTENT_TYPES.get(content_type.split(';')[0].strip().lower())
+    return None
+
+def make_session(concurrency: int = CONCURRENCY, per_host: int = PER_HOST_LIMIT) -> requests.Session:
+    # image CDNs serve many files per host, so each host keeps up to per_host
+    # connections open for the next download instead of reconnecting each time
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=per_host)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch(image_url: str, session: requests.Session = requests, retries: int = RETRIES,
+          timeout: float = TIMEOUT, headers: dict[str, str] | None = None) -> requests.Response:
+    # retries connection errors and retryable statuses with exponential backoff and jitter.
+    # the body is left unread so the caller can stream it
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(image_url, timeout=timeout, stream=True, headers=headers)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                return response
+            response.close()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        backoff(attempt)
+
+def backoff(attempt: int):
+    time.sleep(BACKOFF * 2 ** attempt * (1 + random.random()))
+
+def part_path(directory: str, url: str, name: str) -> str:
+    key = hashlib.sha256(f"{url}\n{name}".encode()).hexdigest()[:32]
+    return os.path.join(directory, f"{key}.part")
+
+class PartLocks:
+    # one lock per .part file: the same URL downloaded under the same name twice
+    # at once would write the same file, so the second waits for the first
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locks = {}
+
+    @contextlib.contextmanager
+    def __call__(self, path: str):
+        with self.lock:
+            entry = self.locks.setdefault(path, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.locks[path]
+
+part_locks = PartLocks()
+
+class PartialDownload:
+    # <key>.part holds the bytes received so far and <key>.part.json the URL,
+    # expected length and validators, so a later attempt can ask for the rest
+    def __init__(self, directory: str, url: str, name: str):
+        self.url = url
+        self.path = part_path(directory, url, name)
+        self.meta_path = f"{self.path}.json"
+        try:
+            with open(self.meta_path, encoding='utf-8') as file:
+                self.meta = json.load(file)
+        except (OSError, ValueError):
+            self.meta = {}
+        if self.meta.get('url') != url or not os.path.exists(self.path):
+            self.meta = {}
+
+    @property
+    def offset(self) -> int:
+        return os.path.getsize(self.path) if self.meta else 0
+
+    def complete(self) -> bool:
+        return bool(self.meta.get('length')) and self.offset == self.meta['length']
+
+    def headers(self) -> dict[str, str]:
+        # If-Range makes the server send the whole file again if it changed since
+        validator = self.meta.get('etag') or self.meta.get('last_modified')
+        if not self.offset or not validator:
+            return {}
+        return {'Range': f"bytes={self.offset}-", 'If-Range': validator}
+
+    def resumes(self, response: requests.Response) -> bool:
+        content_range = response.headers.get('Content-Range', '')
+        return (response.status_code == 206 and self.offset > 0
+                and content_range.startswith(f"bytes {self.offset}-"))
+
+    def start(self, response: requests.Response):
+        length = response.headers.get('Content-Length')
+        # a compressed body is decoded while streaming, so neither its length
+        # nor a byte range would match what ends up in the file
+        plain = response.headers.get('Content-Encoding', 'identity') == 'identity'
+        self.meta = {
+            'url': self.url,
+            'length': int(length) if plain and length and length.isdigit() else None,
+            'etag': response.headers.get('ETag') if plain else None,
+            'last_modified': response.headers.get('Last-Modified') if plain else None,
+            'content_type': response.headers.get('Content-Type'),
+        }
+        with open(self.meta_path, 'w', encoding='utf-8') as file:
+            json.dump(self.meta, file)
+
+    def receive(self, response: requests.Response | None) -> tuple[str, int, str]:
+        # streams the body into the .part file, appending if the server resumed
+        # where the last attempt stopped, and returns (extension, size, sha256)
+        digest = hashlib.sha256()
+        chunks = response.iter_content(CHUNK_SIZE) if response is not None else iter(())
+        if response is None or self.resumes(response):
+            size = self.offset
+            with open(self.path, 'rb') as file:
+                head = file.read(CHUNK_SIZE)
+                digest.update(head)
+                for block in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(block)
+            pending, mode = [], 'ab'
         else:
-            image_name = f"{name}{ext}"
-    else:
-        raise Exception("Image extension could not be located...")
-    
-    if os.path.isfile(image_name):
-        raise Exception("File already exists!")
-    
-    if folder and not os.path.exists(folder):
-        os.makedirs(folder)
-    
+            self.start(response)
+            size = 0
+            head = next(chunks, b'')
+            pending, mode = [head], 'wb'
+
+        ext = detect_extension(head, self.meta.get('content_type'))
+        if not ext:
+            self.discard()
+            raise ValueError("Image format could not be detected...")
+
+        with open(self.path, mode) as handler:
+            for chunk in itertools.chain(pending, chunks):
+                handler.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+
+        self.verify(response, size, digest)
+        os.unlink(self.meta_path)
+        return ext, size, digest.hexdigest()
+
+    def verify(self, response: requests.Response | None, size: int, digest):
+        if self.meta.get('length') is not None and size != self.meta['length']:
+            self.discard()
+            raise ValueError(f"Expected {self.meta['length']} bytes, got {size}")
+        # Repr-Digest (RFC 9530) covers the whole file, even on a 206
+        expected = response.headers.get('Repr-Digest', '') if response is not None else ''
+        for item in expected.split(','):
+            algorithm, _, value = item.strip().partition('=')
+            if algorithm == 'sha-256' and base64.b64decode(value.strip(':')) != digest.digest():
+                self.discard()
+                raise ValueError("Downloaded file does not match the server's SHA-256")
+
+    def discard(self):
+        for path in (self.path, self.meta_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+@dataclass
+class Download:
+    path: str
+    size: int
+    digest: str | None = None
+    # 'network', 'url' for a known URL linked without a request, or
+    # 'content' for a download whose bytes were already in the store
+    source: str = 'network'
+
+class ContentStore:
+    # files are kept once under their SHA-256 and linked to every name they are
+    # downloaded as; urls.tsv remembers which URL gave which content
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self.lock = threading.Lock()
+        self.urls = {}
+        index_name = os.path.join(root, 'urls.tsv')
+        if os.path.exists(index_name):
+            with open(index_name, encoding='utf-8') as file:
+                for line in file:
+                    digest, ext, url = line.rstrip('\n').split('\t', 2)
+                    self.urls[url] = (digest, ext)
+        self.index = open(index_name, 'a', encoding='utf-8')
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def lookup(self, url: str) -> tuple[str, str] | None:
+        known = self.urls.get(url)
+        if known and os.path.exists(self.object_path(known[0])):
+            return known
+        return None
+
+    def add(self, temp_name: str, digest: str) -> bool:
+        # moves a finished download into the store; False if the content was already there
+        path = self.object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(temp_name, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(temp_name)
+
+    def remember(self, url: str, digest: str, ext: str):
+        with self.lock:
+            if self.urls.get(url) != (digest, ext):
+                self.urls[url] = (digest, ext)
+                self.index.write(f"{digest}\t{ext}\t{url}\n")
+                self.index.flush()
+
+    def link(self, digest: str, image_name: str):
+        # hard link where possible, a symlink across file systems
+        path = self.object_path(digest)
+        try:
+            os.link(path, image_name)
+        except FileExistsError:
+            raise
+        except OSError:
+            os.symlink(os.path.abspath(path), image_name)
+
+    def close(self):
+        self.index.close()
+
+def commit_file(temp_name: str, image_name: str):
+    # the name is only claimed once the download is complete, and never over a
+    # file that appeared in the meantime: a link fails if the name is taken
     try:
-        image_contents: bytes = requests.get(image_url).content
-        with open(image_name, 'wb') as handler:
-            handler.write(image_contents)
+        os.link(temp_name, image_name)
+    except FileExistsError:
+        os.unlink(temp_name)
+        raise FileExistsError("File already exists!")
+    except OSError:
+        # no hard links on this file system: claim the name, then move onto it
+        try:
+            os.close(os.open(image_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            os.unlink(temp_name)
+            raise FileExistsError("File already exists!")
+        os.replace(temp_name, image_name)
+        return
+    os.unlink(temp_name)
+
+def image_path(name: str, ext: str, folder: str = None) -> str:
+    if folder:
+        return f"{folder}/{name}{ext}"
+    return f"{name}{ext}"
+
+def download_image(image_url: str, name: str, folder: str = None, session: requests.Session | None = None,
+                   retries: int = 0, timeout: float = TIMEOUT, store: ContentStore | None = None) -> Download:
+    directory = store.root if store else folder or '.'
+    # a duplicate of a running download waits here, then finds its name taken
+    with part_locks(part_path(directory, image_url, name)):
+        # the format is only known once the first chunk arrives, so a name taken
+        # under any image extension counts as existing
+        if any(os.path.isfile(image_path(name, ext, folder)) for ext in EXTENSIONS):
+            raise FileExistsError("File already exists!")
+
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        if store and (known := store.lookup(image_url)):
+            digest, ext = known
+            image_name = image_path(name, ext, folder)
+            store.link(digest, image_name)
+            print(f"Linked: {image_name} from the store")
+            return Download(image_name, os.path.getsize(image_name), digest, 'url')
+
+        part = PartialDownload(directory, image_url, name)
+        for attempt in range(retries + 1):
+            if part.complete():
+                # every byte arrived last time; only the checks and rename were missing
+                ext, size, digest = part.receive(None)
+                break
+            try:
+                response = fetch(image_url, session or requests, retries, timeout, part.headers())
+            except requests.HTTPError as e:
+                if e.response.status_code != 416 or attempt == retries:
+                    raise
+                # the range no longer fits the file on the server: start over
+                part.discard()
+                continue
+            try:
+                with response:
+                    ext, size, digest = part.receive(response)
+                break
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                # the .part file keeps what arrived, the next attempt asks for the rest
+                if attempt == retries:
+                    raise
+                backoff(attempt)
+        temp_name = part.path
+        image_name = image_path(name, ext, folder)
+
+        if not store:
+            commit_file(temp_name, image_name)
             print(f"Downloaded: {image_name} successfully!")
-    except Exception as e:
-        print(f"Error: {e}")
+            return Download(image_name, size, digest)
+
+        stored = store.add(temp_name, digest)
+        store.remember(image_url, digest, ext)
+        store.link(digest, image_name)
+        print(f"Downloaded: {image_name} successfully!")
+        return Download(image_name, size, digest, 'network' if stored else 'content')
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    thumbnails: tuple[int, ...] = ()
+    formats: tuple[str, ...] = ()
+    strip_exif: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.thumbnails or self.formats or self.strip_exif)
+
+def save_image(image, path: str, image_format: str, exif: bytes | None):
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    options = {'exif': exif} if exif else {}
+    image.save(f"{path}.tmp", image_format, **options)
+    os.replace(f"{path}.tmp", path)
+
+def make_derivatives(image_name: str, spec: DerivativeSpec, folder: str) -> tuple[list[str], float]:
+    # runs in a worker process: the image is decoded once and every derivative
+    # is made from that copy. Pillow is only needed when derivatives are asked for
+    from PIL import Image, ImageOps
+
+    start = time.perf_counter()
+    os.makedirs(folder, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(image_name))
+    with Image.open(image_name) as source:
+        source_format = source.format
+        # applies the EXIF orientation, which then no longer needs to be kept
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    exif = None if spec.strip_exif else image.info.get('exif')
+
+    targets = []
+    for size in spec.thumbnails:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        targets.append((thumbnail, f"{stem}_{size}px{ext}", source_format))
+    for name in spec.formats:
+        targets.append((image, f"{stem}.{name}", SAVE_FORMATS[name]))
+    if not targets:
+        # --strip-exif alone writes a clean copy in the original format
+        targets.append((image, f"{stem}{ext}", source_format))
+
+    outputs = []
+    for derivative, filename, image_format in targets:
+        path = os.path.join(folder, filename)
+        save_image(derivative, path, image_format, exif)
+        outputs.append(path)
+    return outputs, time.perf_counter() - start
+
+def read_batch(path: str):
+    # one "url,name" pair per line; without a name the last part of the URL path is used
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.reader(file):
+            if not row or not row[0].strip() or row[0].startswith('#'):
+                continue
+            url = row[0].strip()
+            name = row[1].strip() if len(row) > 1 and row[1].strip() else None
+            if name is None:
+                name = os.path.splitext(os.path.basename(urlsplit(url).path))[0] or urlsplit(url).hostname
+            yield url, name
+
+@dataclass
+class BatchSummary:
+    succeeded: int = 0
+    skipped: int = 0
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    bytes: int = 0
+    seconds: float = 0.0
+    url_hits: int = 0
+    duplicates: int = 0
+    bytes_saved: int = 0
+    download_seconds: float = 0.0
+    derived: int = 0
+    derivatives: int = 0
+    derive_failed: list[tuple[str, str]] = field(default_factory=list)
+    derive_seconds: float = 0.0
+    derive_cpu: float = 0.0
+    # downloads queued or running, and downloaded images waiting for the
+    # process pool, sampled every time something finishes
+    download_depths: list[int] = field(default_factory=list)
+    derive_depths: list[int] = field(default_factory=list)
+
+    def add(self, download: Download):
+        self.succeeded += 1
+        if download.source == 'url':
+            self.url_hits += 1
+            self.bytes_saved += download.size
+            return
+        self.bytes += download.size
+        if download.source == 'content':
+            self.duplicates += 1
+            self.bytes_saved += download.size
+
+    def report(self) -> str:
+        seconds = self.download_seconds or self.seconds
+        rate = self.bytes / seconds if seconds else 0
+        report = (f"Downloaded {self.succeeded}, skipped {self.skipped}, failed {len(self.failed)} "
+                  f"in {seconds:.1f}s ({self.bytes / 1e6:.1f} MB, {rate / 1e6:.2f} MB/s)")
+        if self.url_hits or self.duplicates:
+            ratio = (self.url_hits + self.duplicates) / self.succeeded
+            report += (f"\nStore: {self.url_hits} known URLs, {self.duplicates} duplicate downloads "
+                       f"({ratio:.0%} hit ratio), {self.bytes_saved / 1e6:.1f} MB saved")
+        if self.derived or self.derive_failed:
+            images = self.derived + len(self.derive_failed)
+            report += (f"\nDownload stage: {self.succeeded / self.download_seconds if self.download_seconds else 0:.1f} "
+                       f"images/s, queue depth max {max(self.download_depths, default=0)} "
+                       f"(mean {sum(self.download_depths) / max(len(self.download_depths), 1):.1f})"
+                       f"\nDerivative stage: {self.derived} images -> {self.derivatives} files, "
+                       f"{len(self.derive_failed)} failed in {self.derive_seconds:.1f}s "
+                       f"({images / self.derive_seconds if self.derive_seconds else 0:.1f} images/s, "
+                       f"{self.derive_cpu / max(images, 1) * 1000:.0f} ms per image), queue depth max "
+                       f"{max(self.derive_depths, default=0)} "
+                       f"(mean {sum(self.derive_depths) / max(len(self.derive_depths), 1):.1f})")
+        return report
+
+def download_batch(pairs, folder: str = None, concurrency: int = CONCURRENCY, per_host: int = PER_HOST_LIMIT,
+                   retries: int = RETRIES, timeout: float = TIMEOUT, store: ContentStore | None = None,
+                   derive: DerivativeSpec | None = None, derive_folder: str | None = None,
+                   processes: int | None = None) -> BatchSummary:
+    # rows wait in one queue per host, and a host's next row is only handed to a
+    # worker once fewer than per_host of its downloads run, so a batch dominated by
+    # a single CDN neither gets throttled nor leaves workers waiting on it
+    session = make_session(concurrency, per_host)
+    summary = BatchSummary()
+    start = time.perf_counter()
+    derive_start = None
+    # Pillow work runs in its own processes so decoding never holds the GIL the
+    # download threads need; spawn keeps them from inheriting those threads
+    processor = (ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+                 if derive else contextlib.nullcontext())
+    deriving = {}
+
+    queued = {}
+    ready = set()
+    active = {}
+    waiting = 0
+
+    def download_row(url: str, name: str) -> Download:
+        return download_image(url, name, folder, session, retries, timeout, store)
+
+    def starved() -> bool:
+        # per_host caps each host, so a run of one host's rows fills the queue
+        # without giving the other workers anything to do
+        slots = sum(active.values()) + sum(
+            min(per_host - active.get(host, 0), len(rows)) for host, rows in queued.items())
+        return slots < concurrency
+
+    with session, ThreadPoolExecutor(max_workers=concurrency) as executor, processor:
+        pairs = iter(pairs)
+        pending = {}
+        while True:
+            while waiting < READ_AHEAD_LIMIT and (
+                    waiting + len(pending) < concurrency * QUEUE_FACTOR or starved()):
+                pair = next(pairs, None)
+                if pair is None:
+                    break
+                url, name = pair
+                if store and store.lookup(url):
+                    # known URLs need no request, so they do not wait for the host
+                    pending[executor.submit(download_row, url, name)] = (url, name, None)
+                    continue
+                host = urlsplit(url).hostname or url
+                queued.setdefault(host, deque()).append(pair)
+                ready.add(host)
+                waiting += 1
+
+            for host in ready:
+                rows = queued[host]
+                while rows and active.get(host, 0) < per_host:
+                    url, name = rows.popleft()
+                    pending[executor.submit(download_row, url, name)] = (url, name, host)
+                    active[host] = active.get(host, 0) + 1
+                    waiting -= 1
+                if not rows:
+                    del queued[host]
+            ready.clear()
+
+            if not pending and not deriving:
+                break
+            done, _ = wait([*pending, *deriving], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in deriving:
+                    image_name = deriving.pop(future)
+                    try:
+                        outputs, cpu = future.result()
+                        summary.derived += 1
+                        summary.derivatives += len(outputs)
+                        summary.derive_cpu += cpu
+                    except Exception as e:
+                        summary.derive_failed.append((image_name, str(e)))
+                        print(f"Error: could not process {image_name}: {e}")
+                    continue
+
+                url, name, host = pending.pop(future)
+                if host:
+                    active[host] -= 1
+                    if not active[host]:
+                        del active[host]
+                    if host in queued:
+                        ready.add(host)
+                try:
+                    download = future.result()
+                    summary.add(download)
+                except FileExistsError:
+                    summary.skipped += 1
+                    print(f"Skipped: {name} already exists")
+                    continue
+                except Exception as e:
+                    summary.failed.append((url, str(e)))
+                    print(f"Error: {url}: {e}")
+                    continue
+                if derive:
+                    derive_start = derive_start or time.perf_counter()
+                    deriving[processor.submit(make_derivatives, download.path, derive, derive_folder)] = download.path
+
+            if derive:
+                summary.download_depths.append(waiting + len(pending))
+                summary.derive_depths.append(len(deriving))
+                if not pending and not summary.download_seconds:
+                    summary.download_seconds = time.perf_counter() - start
+
+    if derive_start:
+        summary.derive_seconds = time.perf_counter() - derive_start
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Download images one at a time or from a batch file")
+    parser.add_argument('-b', '--batch', help="File with one \"url,name\" pair per line")
+    parser.add_argument('-f', '--folder', default="images", help="Where images are saved (default: images)")
+    parser.add_argument('-c', '--concurrency', type=int, default=CONCURRENCY,
+                        help=f"Downloads running at once (default: {CONCURRENCY})")
+    parser.add_argument('--per-host', type=int, default=PER_HOST_LIMIT,
+                        help=f"Downloads allowed from the same host at once (default: {PER_HOST_LIMIT})")
+    parser.add_argument('-r', '--retries', type=int, default=RETRIES,
+                        help=f"Extra attempts for failed or throttled downloads (default: {RETRIES})")
+    parser.add_argument('-t', '--timeout', type=float, default=TIMEOUT,
+                        help=f"Seconds to wait for a server (default: {TIMEOUT})")
+    parser.add_argument('-s', '--store', help="Keep downloads once by SHA-256 in this folder and link "
+                                              "duplicates and already-downloaded URLs to it")
+    parser.add_argument('--thumbnail', type=int, action='append', default=[], metavar='PIXELS',
+                        help="Also save a thumbnail at most PIXELS wide and high (repeatable, needs Pillow)")
+    parser.add_argument('--convert', action='append', default=[], choices=SAVE_FORMATS,
+                        help="Also save a full-size copy in this format (repeatable, needs Pillow)")
+    parser.add_argument('--strip-exif', action='store_true',
+                        help="Leave EXIF metadata out of derivatives; alone, saves a clean copy (needs Pillow)")
+    parser.add_argument('--derivatives', help="Where derivatives are saved (default: <folder>/derivatives)")
+    parser.add_argument('-p', '--processes', type=int,
+                        help="Processes making derivatives (default: one per CPU)")
+    parser.add_argument('--failures', help="Write the URLs that failed, with the reason, to this CSV file")
+    args = parser.parse_args()
+
+    derive = DerivativeSpec(tuple(args.thumbnail), tuple(args.convert), args.strip_exif)
+    if derive and importlib.util.find_spec('PIL') is None:
+        parser.error("--thumbnail, --convert and --strip-exif need Pillow (pip install Pillow)")
+    derive_folder = args.derivatives or os.path.join(args.folder, 'derivatives')
+    store = ContentStore(args.store) if args.store else None
+
+    if args.batch:
+        summary = download_batch(read_batch(args.batch), args.folder, args.concurrency, args.per_host,
+                                 args.retries, args.timeout, store, derive, derive_folder, args.processes)
+        if store:
+            store.close()
+        print(summary.report())
+        if args.failures:
+            with open(args.failures, 'w', newline='', encoding='utf-8') as file:
+                csv.writer(file).writerows(summary.failed)
+        return
 
-if __name__ == "__main__":
     input_url: str = input("Enter a URL: ")
     input_name: str = input("What do you want to name it? ")
 
     print("Downloading...")
-    download_image(input_url, input_name, folder="images")
+    try:
+        download = download_image(input_url, input_name, folder=args.folder, retries=args.retries,
+                                  timeout=args.timeout, store=store)
+        if derive:
+            outputs, _ = make_derivatives(download.path, derive, derive_folder)
+            print(f"Saved {len(outputs)} derivatives to {derive_folder}")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        if store:
+            store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+import tracemalloc
+import pytest
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from image_downloader import (
+    download_image, download_batch, read_batch, detect_extension, make_derivatives,
+    ContentStore, DerivativeSpec, CHUNK_SIZE
+)
+
+LARGE_SIZE = 64 * 1024 * 1024
+BLOCK = memoryview(bytes(1024 * 1024))
+SMALL = b"\x89PNG\r\n\x1a\n" + bytes(1000)
+RESUMABLE = b"\x89PNG\r\n\x1a\n" + bytes(range(251)) * 16000
+ETAG = '"v1"'
+requests_seen = []
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        requests_seen.append((self.path, self.headers.get("Range")))
+        if self.path == "/resumable.png":
+            self.send_resumable()
+            return
+        if self.path.startswith("/slow/"):
+            time.sleep(0.5)
+        if self.path.startswith("/trickle/"):
+            # the body arrives over half a second, so overlapping downloads overlap their writes
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(SMALL)))
+            self.end_headers()
+            for offset in range(0, len(SMALL), 100):
+                self.wfile.write(SMALL[offset:offset + 100])
+                self.wfile.flush()
+                time.sleep(0.05)
+            return
+        if self.path.startswith(("/small", "/cdn/", "/slow/")):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(SMALL)))
+            self.end_headers()
+            self.wfile.write(SMALL)
+            return
+        # /broken.png promises more bytes than it sends, like a dropped connection
+        size = LARGE_SIZE if self.path == "/large.png" else 8 * len(BLOCK)
+        sent = size if self.path == "/large.png" else len(BLOCK)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        for offset in range(0, sent, len(BLOCK)):
+            self.wfile.write(BLOCK[:min(len(BLOCK), sent - offset)])
+        self.close_connection = True
+
+    def send_resumable(self):
+        # honours Range for the current ETag; a full request drops after 1 MB
+        start = 0
+        if self.headers.get("Range") and self.headers.get("If-Range") == ETAG:
+            start = int(self.headers["Range"][len("bytes="):].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(RESUMABLE) - 1}/{len(RESUMABLE)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(RESUMABLE) - start))
+        self.end_headers()
+        self.wfile.write(RESUMABLE[start:] if start else RESUMABLE[:1024 * 1024])
+        self.close_connection = True
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_large_download_is_streamed(server, tmp_path):
+    tracemalloc.start()
+    try:
+        download = download_image(f"{server}/large.png", "large", folder=str(tmp_path))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert download.size == LARGE_SIZE
+    assert os.path.getsize(tmp_path / "large.png") == LARGE_SIZE
+    # the whole body would be 64 MB; streaming keeps a few chunks at most
+    assert peak < 16 * CHUNK_SIZE
+
+def test_failed_download_leaves_no_file(server, tmp_path):
+    with pytest.raises(requests.RequestException):
+        download_image(f"{server}/broken.png", "broken", folder=str(tmp_path))
+
+    # only the .part file and its metadata, never a file under the real name
+    assert sorted(os.path.splitext(name)[1] for name in os.listdir(tmp_path)) == [".json", ".part"]
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    requests_seen.clear()
+    download = download_image(f"{server}/resumable.png", "resumed", folder=str(tmp_path), retries=1)
+
+    assert requests_seen == [("/resumable.png", None), ("/resumable.png", f"bytes={1024 * 1024}-")]
+    assert download.size == len(RESUMABLE)
+    assert (tmp_path / "resumed.png").read_bytes() == RESUMABLE
+    assert os.listdir(tmp_path) == ["resumed.png"]
+
+def test_partial_file_survives_between_runs(server, tmp_path):
+    with pytest.raises(requests.RequestException):
+        download_image(f"{server}/resumable.png", "later", folder=str(tmp_path))
+
+    requests_seen.clear()
+    download_image(f"{server}/resumable.png", "later", folder=str(tmp_path))
+
+    assert requests_seen == [("/resumable.png", f"bytes={1024 * 1024}-")]
+    assert (tmp_path / "later.png").read_bytes() == RESUMABLE
+
+def test_existing_file_is_not_overwritten(server, tmp_path):
+    (tmp_path / "large.png").write_bytes(b"old")
+
+    with pytest.raises(FileExistsError):
+        download_image(f"{server}/large.png", "large", folder=str(tmp_path))
+
+    assert (tmp_path / "large.png").read_bytes() == b"old"
+
+def test_name_taken_during_download_is_not_overwritten(server, tmp_path):
+    errors = []
+
+    def download():
+        try:
+            download_image(f"{server}/slow/image.png", "image", folder=str(tmp_path))
+        except FileExistsError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=download)
+    thread.start()
+    time.sleep(0.2)
+    (tmp_path / "image.png").write_bytes(b"written meanwhile")
+    thread.join()
+
+    assert len(errors) == 1
+    assert (tmp_path / "image.png").read_bytes() == b"written meanwhile"
+    assert os.listdir(tmp_path) == ["image.png"]
+
+def test_batch_rows_sharing_a_name_are_not_overwritten(server, tmp_path):
+    # without a name column both rows are named after the URL basename, "image"
+    batch = tmp_path / "batch.csv"
+    batch.write_text(f"{server}/slow/a/image.png\n{server}/slow/b/image.png\n")
+    folder = tmp_path / "images"
+
+    summary = download_batch(read_batch(str(batch)), str(folder), concurrency=2, retries=0)
+
+    assert (summary.succeeded, summary.skipped, summary.failed) == (1, 1, [])
+    assert os.listdir(folder) == ["image.png"]
+
+@pytest.mark.parametrize("with_store", [False, True])
+def test_batch_row_repeated_is_downloaded_once(server, tmp_path, with_store):
+    # both rows share one .part file, so the second waits for the first
+    batch = tmp_path / "batch.csv"
+    batch.write_text(f"{server}/trickle/same.png,same\n" * 2)
+    folder = tmp_path / "images"
+    store = ContentStore(str(tmp_path / "store")) if with_store else None
+
+    summary = download_batch(read_batch(str(batch)), str(folder), concurrency=2, retries=0, store=store)
+    if store:
+        store.close()
+
+    assert (summary.succeeded, summary.skipped, summary.failed) == (1, 1, [])
+    assert os.listdir(folder) == ["same.png"]
+
+def test_store_keeps_duplicate_content_once(server, tmp_path):
+    store = ContentStore(str(tmp_path / "store"))
+    first = download_image(f"{server}/small-a.png", "a", folder=str(tmp_path), store=store)
+    second = download_image(f"{server}/small-b.png", "b", folder=str(tmp_path), store=store)
+    store.close()
+
+    assert (first.source, second.source) == ("network", "content")
+    assert first.digest == second.digest
+    assert os.path.samefile(tmp_path / "a.png", tmp_path / "b.png")
+    assert len(os.listdir(tmp_path / "store" / "objects" / first.digest[:2])) == 1
+
+def test_store_links_known_url_without_request(server, tmp_path):
+    store = ContentStore(str(tmp_path / "store"))
+    download_image(f"{server}/small-c.png", "c", folder=str(tmp_path), store=store)
+    store.close()
+    requests_seen.clear()
+
+    store = ContentStore(str(tmp_path / "store"))
+    again = download_image(f"{server}/small-c.png", "c-again", folder=str(tmp_path), store=store)
+    store.close()
+
+    assert again.source == "url"
+    assert requests_seen == []
+    assert (tmp_path / "c-again.png").read_bytes() == SMALL
+
+@pytest.mark.parametrize("head, ext", [
+    (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", ".png"),
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", ".jpg"),
+    (b"GIF89a\x01\x00\x01\x00", ".gif"),
+    (b"RIFF\x24\x00\x00\x00WEBPVP8 ", ".webp"),
+    (b"\x00\x00\x00\x1cftypavif\x00\x00\x00\x00avifmif1miaf", ".avif"),
+    (b"\x00\x00\x00\x1cftypmif1\x00\x00\x00\x00mif1avifmiaf", ".avif"),
+    (b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg">', ".svg"),
+    (b"  <svg width='1'></svg>", ".svg"),
+])
+def test_detect_extension_from_signature(head, ext):
+    assert detect_extension(head, "text/html") == ext
+
+def test_detect_extension_falls_back_to_content_type():
+    assert detect_extension(b"\x00" * 16, "image/jpeg; charset=binary") == ".jpg"
+    assert detect_extension(b"<!doctype html><html>", "text/html") is None
+    assert detect_extension(b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic") is None
+
+def test_extensionless_url_is_named_from_content(server, tmp_path):
+    download = download_image(f"{server}/cdn/12345?w=200", "product", folder=str(tmp_path))
+
+    assert download.path.endswith("product.png")
+    assert (tmp_path / "product.png").read_bytes() == SMALL
+
+def test_derivatives_from_one_decode(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera"
+    Image.new("RGB", (400, 300), "red").save(tmp_path / "photo.jpg", exif=exif)
+
+    outputs, _ = make_derivatives(str(tmp_path / "photo.jpg"), DerivativeSpec((100,), ("webp",), True),
+                                  str(tmp_path / "derivatives"))
+
+    assert sorted(os.path.basename(path) for path in outputs) == ["photo.webp", "photo_100px.jpg"]
+    with Image.open(tmp_path / "derivatives" / "photo_100px.jpg") as thumbnail:
+        # rotated by the orientation tag, and no EXIF left
+        assert thumbnail.size == (75, 100)
+        assert dict(thumbnail.getexif()) == {}
+
+def test_batch_sorted_by_host_keeps_every_worker_busy(server, tmp_path):
+    # "localhost" and "127.0.0.1" are two hosts to the downloader; with two
+    # downloads per host at a time all four workers start at once
+    other = server.replace("127.0.0.1", "localhost")
+    pairs = [(f"{server}/slow/a{i}.png", f"a{i}") for i in range(4)] + \
+            [(f"{other}/slow/b{i}.png", f"b{i}") for i in range(4)]
+
+    summary = download_batch(pairs, str(tmp_path), concurrency=4, per_host=2, retries=0)
+
+    assert (summary.succeeded, summary.failed) == (8, [])
+    # two rounds of 0.5s; blocked workers would need three
+    assert summary.seconds < 1.3